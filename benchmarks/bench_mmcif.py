@@ -0,0 +1,54 @@
+"""
+Throughput of the mmCIF reader compared to the PDB parser
+
+A synthetic single-chain structure is written in both formats, then the
+coordinates are extracted with extract_coordinates (PDB) and
+extract_mmcif_coordinates (mmCIF).
+
+Usage: python benchmarks/bench_mmcif.py [--atoms 2000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# from a source checkout, pdbpy is imported from the repository
+sys.path.insert(0, ROOT_DIR)
+from pdbpy.extract import extract_coordinates
+from pdbpy.mmcif import extract_mmcif_coordinates
+from synthetic import synthetic_chain, write_pdb, write_mmcif
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--atoms', type=int, default=2000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    coordinates = synthetic_chain(args.atoms)
+    with tempfile.TemporaryDirectory() as directory:
+        pdb_file = os.path.join(directory, 'synt.pdb')
+        cif_file = os.path.join(directory, 'synt.cif')
+        write_pdb(pdb_file, coordinates)
+        write_mmcif(cif_file, coordinates)
+        t_pdb, r_pdb = best_time(lambda: extract_coordinates(pdb_file, download_from_pdb=False), args.repeat)
+        t_cif, r_cif = best_time(lambda: extract_mmcif_coordinates(cif_file, download_from_pdb=False), args.repeat)
+    assert np.allclose(r_pdb, r_cif)
+    print('{} atoms'.format(args.atoms))
+    print('PDB   : {:.3f} s ({:.2f} Matoms/s)'.format(t_pdb, args.atoms / t_pdb / 1e6))
+    print('mmCIF : {:.3f} s ({:.2f} Matoms/s)'.format(t_cif, args.atoms / t_cif / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Parity and timing of the backends of the numerical kernels (see pdbpy.backends)
+
+Every backend of every kernel is compared with the reference backend on the
+C-alpha chains of examples/*.pdb and on synthetic chains, then timed.
+Exit code 1 if a backend gives a different result from the reference.
+
+Usage: python benchmarks/check_backends.py [--sizes 10 100 1000 10000] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import numpy as np
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# from a source checkout, pdbpy is imported from the repository
+sys.path.insert(0, ROOT_DIR)
+from pdbpy import backends
+from pdbpy.extract import extract_calpha_coordinates
+from synthetic import synthetic_chain
+
+EXAMPLES_DIR = os.path.join(ROOT_DIR, 'examples')
+# Kernels with a quadratic cost are not run on larger inputs
+MAX_SIZE = {'msd': 2000, 'distance_matrix': 2000}
+# The numpy backend of distance_matrix uses |p-q|^2 = |p|^2 + |q|^2 - 2 p.q (rounding errors ~ 1e-7 nm)
+TOLERANCES = {'distance_matrix': {'rtol': 1e-6, 'atol': 1e-6}}
+
+
+def kernel_arguments(kernel, calphas):
+    """
+    Arguments of a kernel, computed from C-alpha coordinates as in screwframe_rotation_centers
+    """
+    if kernel in ('frenet_bases', 'msd', 'distance_matrix'):
+        return (calphas,)
+    fbs = backends.get('frenet_bases', 0, 'reference')(calphas)
+    if kernel == 'frame_rotation_and_distance':
+        return (fbs,)
+    q_delta = backends.get('frame_rotation_and_distance', 0, 'reference')(fbs)
+    quaternions = np.array([q for q, delta in q_delta])
+    translations = calphas[2:-1] - calphas[1:-2]
+    # one pure translation, to check this particular case
+    quaternions[0] = [1., 0., 0., 0.]
+    return quaternions, translations
+
+
+def best_time(function, arguments, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*arguments)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parity and timing of the backends of pdbpy')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000, 10000],
+                        help='number of C-alpha atoms of the synthetic chains')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    chains = [(os.path.basename(f), extract_calpha_coordinates(f, download_from_pdb=False))
+              for f in sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.pdb')))]
+    chains += [('synthetic_{}'.format(size), synthetic_chain(size) / 10) for size in args.sizes]
+
+    failed = False
+    for kernel in backends.kernels():
+        print('{} (backends: {})'.format(kernel, ', '.join(backends.available(kernel))))
+        for name, calphas in chains:
+            if len(calphas) > MAX_SIZE.get(kernel, len(calphas)):
+                continue
+            arguments = kernel_arguments(kernel, calphas)
+            parity = backends.check_parity(kernel, *arguments, **TOLERANCES.get(kernel, {}))
+            columns = []
+            for backend, (same, deviation) in parity.items():
+                function = backends.get(kernel, 0, backend)
+                columns.append('{} {:.2e} s {}{:.1e}'.format(backend, best_time(function, arguments, args.repeat),
+                                                            '' if same else 'MISMATCH ', deviation))
+                failed = failed or not same
+            print('  {:<24s} {:>6d}  {}  (selected: {})'.format(name, len(calphas), ' | '.join(columns),
+                                                                 backends.select(kernel, len(calphas))))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
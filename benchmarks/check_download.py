@@ -0,0 +1,174 @@
+"""
+Behaviour of pdbpy.download.download_pdb against a local stand-in of the PDB server
+
+A local HTTP server serves examples/*.pdb (compressed or not) with ETag,
+Last-Modified, conditional requests and Range requests, and can inject
+faults (connection dropped during the transfer, HTTP 503, truncated file).
+Each scenario checks the downloaded file, the number of bytes transferred
+and that no partial file is left behind.
+Exit code 1 if a check fails.
+
+Usage: python benchmarks/check_download.py
+"""
+import email.utils
+import gzip
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# from a source checkout, pdbpy is imported from the repository
+sys.path.insert(0, ROOT_DIR)
+from pdbpy import download, profiling
+
+EXAMPLES_DIR = os.path.join(ROOT_DIR, 'examples')
+
+
+class StandIn:
+    """
+    Files served by the server and faults to inject (one per request, in order)
+    """
+    def __init__(self):
+        self.files = {}
+        self.faults = []
+        self.requests = []
+        self.sent = 0
+
+    def set_file(self, name, content):
+        self.files[name] = (content, gzip.compress(content, mtime=0),
+                            '"{}"'.format(hashlib.md5(content).hexdigest()),
+                            email.utils.formatdate(usegmt=True))
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        state = self.server.state
+        name = os.path.basename(self.path)
+        fault = state.faults.pop(0) if state.faults else None
+        state.requests.append((name, self.headers.get('Range'), self.headers.get('If-None-Match')))
+        compressed = name.endswith('.gz')
+        if fault == '503' or name[:-3 if compressed else None] not in state.files:
+            self.send_response(503 if fault == '503' else 404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content, content_gz, etag, last_modified = state.files[name[:-3 if compressed else None]]
+        body = content_gz if compressed else content
+        if fault == 'truncate':
+            body = body[:len(body) // 2]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get('Range') and self.headers.get('If-Range', etag) == etag:
+            start = int(self.headers['Range'][len('bytes='):-1])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(body) - 1, len(body)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body) - start))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        if fault == 'drop':
+            # connection closed in the middle of the transfer
+            body = body[:start + (len(body) - start) // 2]
+        self.wfile.write(body[start:])
+        state.sent += len(body) - start
+        if fault == 'drop':
+            self.close_connection = True
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.state = state = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+    download.BACKOFF = 0.01
+    with open(os.path.join(EXAMPLES_DIR, '1dpx.pdb'), 'rb') as input:
+        content = input.read()
+    state.set_file('1dpx.pdb', content)
+    size_gz = len(state.files['1dpx.pdb'][1])
+
+    failed = False
+    os.chdir(tempfile.mkdtemp())
+
+    def check(name, condition):
+        nonlocal failed
+        print('{:<60s} {}'.format(name, 'ok' if condition else 'FAILED'))
+        failed = failed or not condition
+
+    def same_file():
+        with open('1dpx.pdb', 'rb') as input:
+            return input.read() == content
+
+    def reset():
+        state.requests, state.sent = [], 0
+
+    def leftovers():
+        return [f for f in os.listdir(download.METADATA_DIR) if not f.endswith('.json')]
+
+    def downloaded(expected_error=None, **kwargs):
+        # expected_error: exception class expected (exactly)
+        try:
+            download.download_pdb('1dpx', url=url, **kwargs)
+        except download.DownloadError as error:
+            return type(error) is expected_error
+        return expected_error is None
+
+    reset()
+    with profiling.profile() as report:
+        check('compressed download', downloaded() and same_file() and state.sent == size_gz)
+    check('profiling: compressed bytes transferred', report.as_dict()['stages']['download']['bytes_read'] == size_gz)
+    reset()
+    check('up to date: 304, nothing transferred', downloaded() and same_file() and state.sent == 0)
+    reset()
+    content = b'REMARK   0 MODIFIED\n' + content
+    state.set_file('1dpx.pdb', content)
+    size_gz = len(state.files['1dpx.pdb'][1])
+    check('modified on the server: downloaded again', downloaded() and same_file() and state.sent == size_gz)
+    os.remove('1dpx.pdb')
+    reset()
+    state.faults = ['drop']
+    with profiling.profile() as report:
+        check('interrupted transfer resumed with Range',
+              downloaded() and same_file() and state.sent == size_gz and state.requests[1][1] is not None)
+    check('profiling: bytes of both attempts', report.as_dict()['stages']['download']['bytes_read'] == size_gz)
+    os.remove('1dpx.pdb')
+    reset()
+    state.faults = ['503', '503']
+    check('HTTP 503 retried with backoff', downloaded() and same_file() and len(state.requests) == 3)
+    os.remove('1dpx.pdb')
+    reset()
+    check('uncompressed download', downloaded(compressed=False) and same_file() and state.sent == len(content))
+    os.remove('1dpx.pdb')
+    reset()
+    state.faults = ['truncate'] * 3
+    check('invalid content: permanent error, no file left',
+          downloaded(expected_error=download.DownloadError, retries=2)
+          and not os.path.exists('1dpx.pdb') and not leftovers())
+    reset()
+    state.faults = ['503'] * 3
+    check('HTTP 503 after all the retries: transient error',
+          downloaded(expected_error=download.TransientDownloadError, retries=2) and not leftovers())
+    reset()
+    try:
+        download.download_pdb('0xxx', url=url)
+        check('unknown file (404): error', False)
+    except download.DownloadError as error:
+        check('unknown file (404): permanent error, no retry, no file left',
+              type(error) is download.DownloadError and error.status == 404
+              and len(state.requests) == 1 and not os.path.exists('0xxx.pdb') and not leftovers())
+    server.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
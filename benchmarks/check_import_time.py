@@ -0,0 +1,77 @@
+"""
+Import-time budget of the offline core of pdbpy
+
+Imports pdbpy.molecule in fresh interpreters (python -X importtime) and
+checks that:
+    - no networking module is imported (urllib3, http, socket, ssl, email)
+    - the import time of pdbpy itself (numpy excluded) is below the budget
+
+Exit code 1 if one of the checks fails.
+
+Usage: python benchmarks/check_import_time.py [--budget 20] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MODULE = 'pdbpy.molecule'
+FORBIDDEN_MODULES = ('urllib3', 'http', 'socket', 'ssl', 'email')
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run_python(code, importtime=False):
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, environment.get('PYTHONPATH')]))
+    # Profiling must not change what is imported
+    environment.pop('PDBPY_PROFILE', None)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    return subprocess.run(command, env=environment, check=True, universal_newlines=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def own_import_time(module):
+    """
+    Import time (ms) of module, without the import time of numpy
+    """
+    process = run_python('import ' + module, importtime=True)
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(total)
+    return (cumulative[module] - cumulative.get('numpy', 0)) / 1000
+
+
+def imported_forbidden_modules(module):
+    code = 'import sys, {}; print(" ".join(sys.modules))'.format(module)
+    modules = run_python(code).stdout.split()
+    return [name for name in FORBIDDEN_MODULES
+            if any(m == name or m.startswith(name + '.') for m in modules)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time budget of the offline core of pdbpy')
+    parser.add_argument('--budget', type=float, default=20., help='budget in ms (default: 20)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    forbidden = imported_forbidden_modules(MODULE)
+    if forbidden:
+        print('FAILED: import {} loads {}'.format(MODULE, ', '.join(forbidden)))
+        failed = True
+    # best of several runs: the first one can include the compilation of the .pyc files
+    import_time = min(own_import_time(MODULE) for _ in range(args.repeat))
+    print('import {}: {:.1f} ms (numpy excluded), budget {:.1f} ms'.format(MODULE, import_time, args.budget))
+    if import_time > args.budget:
+        print('FAILED: import time above the budget')
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark suite of pdbpy (offline: no pdb file is downloaded)
+
+Each case is run on the pdb files of examples/ and on synthetic chains
+(see synthetic.py) of 100 to 1,000,000 atoms. For each run, the time per call
+(best and mean of --repeat runs; as with timeit, each run calls the function
+enough times to last at least --min-time) and the peak memory (tracemalloc, in
+a separate call) are recorded. The scaling exponent of each case is the slope of
+log(time) vs log(number of atoms) on the synthetic chains.
+
+Cases with a quadratic cost, or with a Python loop over the atoms, are
+limited to a maximum size (see CASES). Use --max-atoms to go beyond.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --update-baseline       # store benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare               # exit code 1 if a case is slower
+                                                                # than the baseline by more than --threshold
+                                                                # and by more than --noise-floor
+
+The baseline depends on the machine: store it on the machine used for the comparisons.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+import numpy as np
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# from a source checkout, pdbpy is imported from the repository
+sys.path.insert(0, ROOT_DIR)
+import pdbpy
+from pdbpy.extract import extract_coordinates, extract_calpha_coordinates
+from pdbpy.residues import extract_residues
+from pdbpy.inspection import is_dna_or_rna
+from pdbpy.molecule import Molecule
+from pdbpy.screwframe import screwframe_rotation_centers
+from pdbpy.msd import msd, msd_fft
+from synthetic import synthetic_chain, write_pdb
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_DIR = os.path.join(BENCHMARKS_DIR, '..', 'examples')
+BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+SIZES = (100, 1000, 10000, 100000, 1000000)
+# minimum duration (s) of each timed run
+MIN_TIME = 0.2
+# slowdowns (s per call) below this are never reported as regressions
+NOISE_FLOOR = 1e-4
+
+# name: (input, function, maximum number of atoms of the synthetic chains)
+#   input 'file': path of a pdb file
+#   input 'molecule': Molecule built from the pdb file
+#   input 'calpha': C-alpha coordinates (nm), the number of atoms is the number of C-alpha
+CASES = {
+    'extract_coordinates': ('file', lambda f: extract_coordinates(f, download_from_pdb=False), None),
+    'extract_residues': ('file', lambda f: extract_residues(f, download_from_pdb=False), None),
+    'is_dna_or_rna': ('file', lambda f: is_dna_or_rna(f, download_from_pdb=False), None),
+    'Molecule': ('file', lambda f: Molecule(f, download_from_pdb=False), None),
+    'radius_of_gyration': ('molecule', lambda m: m.radius_of_gyration(), None),
+    'screwframe_rotation_centers': ('calpha', screwframe_rotation_centers, 100000),
+    'msd': ('calpha', msd, 10000),
+    'msd_fft': ('calpha', msd_fft, None),
+}
+
+
+def measure(function, argument, repeat, memory=True, min_time=MIN_TIME):
+    """
+    Time per call (best and mean of repeat runs, in s), number of calls per run and
+    peak memory (bytes) of function(argument). Each run lasts at least min_time, so
+    that the time of the fast cases is not dominated by the resolution of the timer.
+    """
+    timer = timeit.Timer(lambda: function(argument))
+    elapsed = timer.timeit(1)
+    number = 1 if elapsed >= min_time else int(min_time / max(elapsed, 1e-7)) + 1
+    times = [timer.timeit(number) / number for _ in range(repeat)]
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        function(argument)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(times), sum(times) / len(times), number, peak_memory
+
+
+def prepare_input(kind, pdb_file):
+    if kind == 'file':
+        return pdb_file
+    if kind == 'molecule':
+        return Molecule(pdb_file, download_from_pdb=False)
+    return extract_calpha_coordinates(pdb_file, download_from_pdb=False)
+
+
+def scaling_exponent(n_atoms, times):
+    """
+    Slope of log(time) vs log(number of atoms)
+    """
+    if len(n_atoms) < 2:
+        return None
+    return float(np.polyfit(np.log(n_atoms), np.log(times), 1)[0])
+
+
+def run(cases, sizes, repeat, memory, max_atoms, min_time=MIN_TIME):
+    results = []
+    examples = sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.pdb')))
+    with tempfile.TemporaryDirectory() as directory:
+        # Synthetic chains (one atom out of 4 is a C-alpha)
+        inputs = [(os.path.basename(f), f) for f in examples]
+        for size in sizes:
+            pdb_file = os.path.join(directory, 'synthetic_{}.pdb'.format(size))
+            write_pdb(pdb_file, synthetic_chain(size))
+            inputs.append(('synthetic_{}'.format(size), pdb_file))
+        atom_counts = {}
+
+        for name in cases:
+            kind, function, limit = CASES[name]
+            if max_atoms is not None:
+                limit = max_atoms
+            for input_name, pdb_file in inputs:
+                if kind == 'calpha':
+                    argument = prepare_input(kind, pdb_file)
+                    n_atoms = len(argument)
+                else:
+                    if pdb_file not in atom_counts:
+                        atom_counts[pdb_file] = len(extract_coordinates(pdb_file, download_from_pdb=False))
+                    n_atoms = atom_counts[pdb_file]
+                if input_name.startswith('synthetic') and limit is not None and n_atoms > limit:
+                    continue
+                if kind != 'calpha':
+                    argument = prepare_input(kind, pdb_file)
+                time_best, time_mean, number, peak_memory = measure(function, argument, repeat,
+                                                                    memory, min_time)
+                results.append({'case': name, 'input': input_name, 'n_atoms': n_atoms,
+                                'time_best': time_best, 'time_mean': time_mean, 'number': number,
+                                'peak_memory': peak_memory})
+                print('{:<28s} {:<28s} {:>8d} atoms  {:10.6f} s  {}'.format(
+                    name, input_name, n_atoms, time_best,
+                    '' if peak_memory is None else '{:.1f} MB'.format(peak_memory / 1e6)))
+
+    scaling = {}
+    for name in cases:
+        synthetic = [r for r in results if r['case'] == name and r['input'].startswith('synthetic')]
+        scaling[name] = {'n_atoms': [r['n_atoms'] for r in synthetic],
+                         'time_best': [r['time_best'] for r in synthetic],
+                         'exponent': scaling_exponent([r['n_atoms'] for r in synthetic],
+                                                      [r['time_best'] for r in synthetic])}
+    metadata = {'date': datetime.now().isoformat(timespec='seconds'),
+                'pdbpy': pdbpy.__version__,
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'repeat': repeat,
+                'min_time': min_time}
+    return {'metadata': metadata, 'results': results, 'scaling': scaling}
+
+
+def compare(report, baseline, threshold, noise_floor=NOISE_FLOOR):
+    """
+    Runs slower than the baseline by more than threshold (relative) and by more
+    than noise_floor (s per call)
+
+    Return
+    ------
+    list of tuple (case, input, time, baseline time)
+    """
+    reference = {(r['case'], r['input']): r['time_best'] for r in baseline['results']}
+    regressions = []
+    for r in report['results']:
+        key = (r['case'], r['input'])
+        if (key in reference and r['time_best'] > (1 + threshold) * reference[key]
+                and r['time_best'] - reference[key] > noise_floor):
+            regressions.append((r['case'], r['input'], r['time_best'], reference[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of pdbpy')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES),
+                        help='number of atoms of the synthetic chains')
+    parser.add_argument('--max-atoms', type=int, default=None,
+                        help='maximum number of atoms for all the cases (default: see CASES)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=MIN_TIME,
+                        help='minimum duration (s) of each timed run (default: {})'.format(MIN_TIME))
+    parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+    parser.add_argument('--output', help='JSON file of the results')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='compare the results with the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown considered as a regression (default: 0.2)')
+    parser.add_argument('--noise-floor', type=float, default=NOISE_FLOOR,
+                        help='slowdown (s per call) below which a case is never a regression '
+                             '(default: {})'.format(NOISE_FLOOR))
+    args = parser.parse_args()
+    if args.compare and not os.path.exists(args.baseline):
+        # checked before the (long) run
+        parser.error('no baseline {}: run with --update-baseline first, on the machine used '
+                     'for the comparisons'.format(args.baseline))
+
+    report = run(args.cases, args.sizes, args.repeat, not args.no_memory, args.max_atoms, args.min_time)
+    for name, curve in report['scaling'].items():
+        if curve['exponent'] is not None:
+            print('scaling {:<28s} time ~ n^{:.2f}'.format(name, curve['exponent']))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.baseline, 'r') as input:
+            baseline = json.load(input)
+        regressions = compare(report, baseline, args.threshold, args.noise_floor)
+        for case, input_name, t, t_ref in regressions:
+            print('REGRESSION {} {}: {:.6f} s (baseline {:.6f} s, x{:.2f})'.format(
+                case, input_name, t, t_ref, t / t_ref))
+        if regressions:
+            sys.exit(1)
+        print('No regression (threshold {:.0%}, noise floor {:g} s)'.format(args.threshold, args.noise_floor))
+
+
+if __name__ == '__main__':
+    main()
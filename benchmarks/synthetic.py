@@ -0,0 +1,49 @@
+"""
+Synthetic structures for the benchmarks
+"""
+import numpy as np
+
+ATOM_NAMES = ('N', 'CA', 'C', 'O')
+
+
+def synthetic_chain(n_atoms, seed=0):
+    """
+    Coordinates (in Angstrom) of a random walk with a 3.8 A step
+    """
+    rng = np.random.RandomState(seed)
+    steps = rng.normal(size=(n_atoms, 3))
+    steps *= 3.8 / np.sqrt((steps**2).sum(axis=1))[:, None]
+    # folded back into a box, so the coordinates fit in the columns of the PDB format
+    return np.cumsum(steps, axis=0) % 1800 - 900
+
+
+def write_pdb(file_name, coordinates):
+    """
+    Write the coordinates as ATOM records. Serial numbers and residue numbers
+    wrap around, as there are not enough columns for large structures.
+    """
+    lines = []
+    for i, (x, y, z) in enumerate(coordinates):
+        lines.append('ATOM  {:5d}  {:<3s} ALA A{:4d}    {:8.3f}{:8.3f}{:8.3f}  1.00  0.00           C  \n'.format(
+            (i + 1) % 100000, ATOM_NAMES[i % 4], (i // 4 + 1) % 10000, x, y, z))
+    lines.append('TER\n')
+    with open(file_name, 'w') as output:
+        output.write(''.join(lines))
+
+
+def write_mmcif(file_name, coordinates):
+    """
+    Write the coordinates as an _atom_site loop
+    """
+    header = ['data_SYNT', '#', 'loop_']
+    header += ['_atom_site.' + name for name in (
+        'group_PDB', 'id', 'type_symbol', 'label_atom_id', 'label_alt_id', 'label_comp_id',
+        'label_asym_id', 'label_entity_id', 'label_seq_id', 'Cartn_x', 'Cartn_y', 'Cartn_z',
+        'occupancy', 'B_iso_or_equiv', 'auth_seq_id', 'auth_asym_id', 'pdbx_PDB_model_num')]
+    lines = ['\n'.join(header) + '\n']
+    for i, (x, y, z) in enumerate(coordinates):
+        lines.append('ATOM {} C {} . ALA A 1 {} {:.3f} {:.3f} {:.3f} 1.00 0.00 {} A 1\n'.format(
+            i + 1, ATOM_NAMES[i % 4], i // 4 + 1, x, y, z, i // 4 + 1))
+    lines.append('#\n')
+    with open(file_name, 'w') as output:
+        output.write(''.join(lines))
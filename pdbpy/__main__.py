@@ -0,0 +1,3 @@
+from pdbpy.cli import main
+
+main()
@@ -0,0 +1,179 @@
+## Registry of the implementations (backends) of the numerical kernels
+##
+## A kernel (ex: 'frenet_bases') can have several backends:
+##     reference: the original implementation (NumPy and Python loops), always available
+##     numpy: vectorized NumPy (pdbpy/kernels.py)
+##     numba: compiled with Numba (pdbpy/kernels_numba.py), only if Numba is installed
+## The backend is selected from the size of the input: the available backend with the
+## highest priority (see PRIORITY) whose minimum size is reached is used.
+## It can be forced with set_backend, use_backend or the environment variable PDBPY_BACKEND.
+
+import os
+from contextlib import contextmanager
+
+ENVIRONMENT_VARIABLE = 'PDBPY_BACKEND'
+PRIORITY = ('numba', 'numpy', 'reference')
+# Minimum size of a backend which is never selected automatically (only when forced)
+MANUAL = float('inf')
+
+# kernel: {backend: (function, minimum size)}
+_registry = {}
+# kernel (None: all the kernels): forced backend
+_forced = {}
+_loaded = False
+
+
+def register(kernel, backend, minimum_size=0):
+    """
+    Decorator registering a function as a backend of a kernel
+
+    Parameters
+    ----------
+    kernel: str
+        Name of the kernel (ex: 'frenet_bases')
+    backend: str
+        Name of the backend (see PRIORITY)
+    minimum_size: int, default is 0
+        The backend is selected automatically only for inputs of this size or more
+    """
+    def decorator(function):
+        _registry.setdefault(kernel, {})[backend] = (function, minimum_size)
+        return function
+    return decorator
+
+
+def _load():
+    """
+    Register the optional backends. They are imported at the first use of a kernel,
+    so that the import of pdbpy stays fast.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    # modules of the reference backends
+    import pdbpy.geometry
+    import pdbpy.msd
+    import pdbpy.screwframe
+    import pdbpy.kernels
+    import importlib.util
+    if importlib.util.find_spec('numba') is not None:
+        import pdbpy.kernels_numba
+
+
+def kernels():
+    """
+    Names of the registered kernels
+    """
+    _load()
+    return sorted(_registry)
+
+
+def available(kernel):
+    """
+    Names of the backends of a kernel, by decreasing priority
+    """
+    _load()
+    return [backend for backend in PRIORITY if backend in _registry[kernel]]
+
+
+def select(kernel, size):
+    """
+    Name of the backend used for an input of a given size
+    """
+    _load()
+    backends = _registry[kernel]
+    forced = _forced.get(kernel, _forced.get(None, os.environ.get(ENVIRONMENT_VARIABLE)))
+    # A forced backend which does not exist for this kernel is ignored
+    if forced in backends:
+        return forced
+    for backend in PRIORITY:
+        if backend in backends and size >= backends[backend][1]:
+            return backend
+    return 'reference'
+
+
+def get(kernel, size, backend=None):
+    """
+    Function implementing a kernel for an input of a given size
+
+    Parameters
+    ----------
+    kernel: str
+    size: int
+        Size of the input (ex: number of atoms)
+    backend: str, default is None
+        If not None, the function of this backend is returned
+    """
+    if backend is None:
+        backend = select(kernel, size)
+    else:
+        _load()
+    return _registry[kernel][backend][0]
+
+
+def set_backend(backend, kernel=None):
+    """
+    Force a backend for a kernel (for all the kernels if kernel is None).
+    backend=None restores the automatic selection.
+    """
+    if backend is None:
+        _forced.pop(kernel, None)
+    else:
+        _forced[kernel] = backend
+
+
+@contextmanager
+def use_backend(backend, kernel=None):
+    """
+    Force a backend within a with block (see set_backend)
+    """
+    previous = _forced.get(kernel)
+    set_backend(backend, kernel)
+    try:
+        yield
+    finally:
+        set_backend(previous, kernel)
+
+
+def _flatten(result):
+    """
+    All the numbers of the result of a kernel (arrays, lists of tuples...) as a 1D array
+    """
+    import numpy as np
+    if isinstance(result, (list, tuple)):
+        if len(result) == 0:
+            return np.zeros(0)
+        return np.concatenate([_flatten(item) for item in result])
+    return np.ravel(np.asarray(result, dtype=float))
+
+
+def check_parity(kernel, *args, rtol=1e-6, atol=1e-9):
+    """
+    Compare the result of every backend of a kernel with the reference backend
+
+    Parameters
+    ----------
+    kernel: str
+    args:
+        Arguments of the kernel
+    rtol, atol: float
+        Tolerances (see numpy.allclose)
+
+    Return
+    ------
+    dict
+        backend: (bool, float)
+            True if the result is the same as the reference, maximum absolute deviation
+    """
+    import numpy as np
+    reference = _flatten(get(kernel, 0, 'reference')(*args))
+    results = {}
+    for backend in available(kernel):
+        result = _flatten(get(kernel, 0, backend)(*args))
+        if result.shape != reference.shape:
+            results[backend] = (False, float('inf'))
+            continue
+        deviation = float(np.abs(result - reference).max()) if result.size else 0.
+        results[backend] = (bool(np.allclose(result, reference, rtol=rtol, atol=atol)), deviation)
+    return results
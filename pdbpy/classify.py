@@ -0,0 +1,247 @@
+## Classification of pdb files (protein, DNA, RNA, hybrid, ligand-only), to filter large
+## directories of pdb files before building any Molecule.
+##
+## Only the header (the records before the first ATOM/HETATM/MODEL record) is read, by large
+## blocks, and its records are matched as bytes (no decoding): the polymer type of each
+## chain is given by the residue names of the SEQRES records. The residue names of the ATOM and
+## HETATM records (1st model) are only read if there is no usable SEQRES record.
+##
+## Example:
+##     from pdbpy.classify import classify
+##     results = classify('pdb_files/', index='pdb_files.index.jsonl', workers=16)
+##     proteins = [f for f, record in results.items() if record['type'] == 'protein']
+
+import os
+import re
+import json
+from glob import glob
+
+# size of the blocks read from the files
+BUFFER_SIZE = 1 << 17
+TYPES = ('protein', 'dna', 'rna', 'hybrid', 'ligand-only', 'unknown')
+
+PROTEIN_RESIDUES = {b'ALA', b'ARG', b'ASN', b'ASP', b'CYS', b'GLN', b'GLU', b'GLY', b'HIS', b'ILE',
+                    b'LEU', b'LYS', b'MET', b'PHE', b'PRO', b'SER', b'THR', b'TRP', b'TYR', b'VAL',
+                    b'MSE', b'SEC', b'PYL', b'UNK'}
+DNA_RESIDUES = {b'DA', b'DC', b'DG', b'DT', b'DI', b'DU'}
+RNA_RESIDUES = {b'A', b'C', b'G', b'U', b'I'}
+
+# records ending the header
+_COORDINATE_RECORDS = frozenset((b'ATOM  ', b'HETATM', b'MODEL '))
+# record, residue name (columns 18 to 20) and chain identifier (column 22)
+_RESIDUES = re.compile(rb'^(ATOM  |HETATM).{11}(...).(.)', re.M)
+_END_OF_MODEL = re.compile(rb'^ENDMDL', re.M)
+
+
+def _atom_residues(input, data):
+    """
+    Residue names of each chain in the ATOM and HETATM records of the 1st model
+
+    Return
+    ------
+    chains: dict
+        chain identifier: set of residue names
+    hetero: bool
+        True if there is at least one HETATM record
+    """
+    chains = {}
+    hetero = False
+    rest = b''
+    while True:
+        block = rest + data
+        # only complete lines, except at the end of the file
+        end = block.rfind(b'\n') + 1 if data else len(block)
+        lines, rest = block[:end], block[end:]
+        end_of_model = _END_OF_MODEL.search(lines)
+        if end_of_model:
+            lines = lines[:end_of_model.start()]
+        for record, name, chain in _RESIDUES.findall(lines):
+            hetero = hetero or record == b'HETATM'
+            chains.setdefault(chain, set()).add(name.strip())
+        if end_of_model or not data:
+            return chains, hetero
+        data = input.read(BUFFER_SIZE)
+
+
+def chain_type(residue_names):
+    """
+    Type of polymer ('protein', 'dna', 'rna') with the most residues, None if
+    no residue is an amino acid or a nucleotide
+    """
+    counts = {'protein': 0, 'dna': 0, 'rna': 0}
+    for name in residue_names:
+        if name in PROTEIN_RESIDUES:
+            counts['protein'] += 1
+        elif name in DNA_RESIDUES:
+            counts['dna'] += 1
+        elif name in RNA_RESIDUES:
+            counts['rna'] += 1
+    polymer = max(counts, key=counts.get)
+    return polymer if counts[polymer] > 0 else None
+
+
+def classify_file(pdb_file):
+    """
+    Classify a pdb file from its SEQRES records (from the residue names of its
+    ATOM and HETATM records if it has no SEQRES record)
+
+    Parameters
+    ----------
+    pdb_file: str
+        Path of the pdb file
+
+    Return
+    ------
+    dict
+        type: str
+            'protein', 'dna', 'rna', 'hybrid' (several types of polymers, ex: protein-DNA
+            complex, DNA/RNA hybrid), 'ligand-only' (HETATM records only) or 'unknown' (no atom)
+        chains: dict
+            chain identifier: type of the polymer ('protein', 'dna' or 'rna')
+        dna_or_rna: bool
+            result of pdbpy.inspection.is_dna_or_rna (COMPND and KEYWDS records)
+    """
+    sequences = {}
+    dna_or_rna = False
+    hetero = False
+    with open(pdb_file, 'rb', buffering=BUFFER_SIZE) as input:
+        line = b''
+        for line in input:
+            record = line[:6]
+            if record in _COORDINATE_RECORDS:
+                break
+            if record == b'SEQRES':
+                # chain identifier (column 12) and residue names (columns 20 to 70)
+                sequences.setdefault(line[11:12], []).extend(line[19:].split())
+            elif record == b'KEYWDS' or line[:10] == b'COMPND   2':
+                # same test as pdbpy.inspection.is_dna_or_rna
+                dna_or_rna = dna_or_rna or b'DNA' in line or b'RNA' in line
+        else:
+            line = b''
+        chains = {chain: chain_type(names) for chain, names in sequences.items()}
+        if not any(chains.values()):
+            residues, hetero = _atom_residues(input, line)
+            chains = {chain: chain_type(names) for chain, names in residues.items()}
+    chains = {chain.decode('latin-1'): polymer for chain, polymer in chains.items() if polymer is not None}
+    polymers = set(chains.values())
+    if len(polymers) > 1:
+        entry_type = 'hybrid'
+    elif polymers:
+        entry_type = polymers.pop()
+    else:
+        entry_type = 'ligand-only' if hetero else 'unknown'
+    return {'type': entry_type, 'chains': chains, 'dna_or_rna': dna_or_rna}
+
+
+def read_index(index):
+    """
+    Records of an index file written by classify (JSON lines; the last record of a file
+    is the valid one)
+
+    Return
+    ------
+    records: dict
+        absolute path of the file: record
+    lines: int
+        number of records in the index file
+    """
+    records = {}
+    lines = 0
+    if index is None or not os.path.exists(index):
+        return records, lines
+    with open(index, 'r') as input:
+        for line in input:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # last line of an interrupted run
+                continue
+            records[record['file']] = record
+            lines += 1
+    return records, lines
+
+
+def _classify(pdb_file, known):
+    """
+    Record of a file (the known record if the file has not changed), and True if it is new
+    """
+    path = os.path.abspath(pdb_file)
+    try:
+        stat = os.stat(path)
+        record = known.get(path)
+        if record is not None and record['size'] == stat.st_size and record['mtime'] == stat.st_mtime_ns:
+            return record, False
+        record = {'file': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        record.update(classify_file(path))
+        return record, True
+    except OSError as error:
+        # not written in the index: classified again at the next run
+        return {'file': path, 'type': 'unknown', 'chains': {}, 'dna_or_rna': False, 'error': str(error)}, False
+
+
+def classify(files, index=None, workers=8):
+    """
+    Classify pdb files (see classify_file) with a pool of threads
+
+    Parameters
+    ----------
+    files: str or list of str
+        Directory (all its .pdb files) or paths of the pdb files
+    index: str, default is None
+        Index file (JSON lines). The files already in the index, and not modified since,
+        are not read again; the new records are appended to the index.
+    workers: int, default is 8
+        Number of threads
+
+    Return
+    ------
+    dict
+        path of the file (as given, or in the directory): record (see classify_file;
+        with the absolute path, the size and the modification time of the file)
+    """
+    if isinstance(files, str):
+        files = sorted(glob(os.path.join(files, '*.pdb')))
+    known, lines = read_index(index)
+    results = {}
+    new_records = 0
+    output = open(index, 'a') if index is not None else None
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # the number of files submitted at the same time is bounded
+            futures = {}
+            files = iter(files)
+            while True:
+                for pdb_file in files:
+                    futures[executor.submit(_classify, pdb_file, known)] = pdb_file
+                    if len(futures) >= 4 * workers:
+                        break
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record, new = future.result()
+                    results[futures.pop(future)] = record
+                    if new and output is not None:
+                        output.write(json.dumps(record) + '\n')
+                        new_records += 1
+    finally:
+        if output is not None:
+            output.close()
+    # The records of the modified files are written again: the index is rewritten
+    # when more than half of its records are out of date
+    if index is not None and lines + new_records > 2 * len(set(known) | {r['file'] for r in results.values()}):
+        _compact(index)
+    return results
+
+
+def _compact(index):
+    """
+    Rewrite an index file with only the last record of each file
+    """
+    records, _ = read_index(index)
+    temporary = index + '.tmp'
+    with open(temporary, 'w') as output:
+        for record in records.values():
+            output.write(json.dumps(record) + '\n')
+    os.replace(temporary, index)
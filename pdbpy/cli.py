@@ -0,0 +1,323 @@
+"""
+Command line interface of pdbpy
+
+Read PDB ids or paths of pdb files (one per line) from a file or from stdin,
+compute the selected properties of the 1st chain and write one row per
+entry on stdout (JSON lines or CSV), as soon as it is ready.
+
+Examples:
+    pdbpy ids.txt --properties residues rg hydrophobicity --workers 8 > results.jsonl
+    cat ids.txt | pdbpy - --format csv --checkpoint run.ckpt >> results.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+# the checkpoint file is written every SAVE_ROWS entries or every SAVE_INTERVAL seconds
+SAVE_ROWS = 1000
+SAVE_INTERVAL = 5.
+
+# name: columns of the property
+PROPERTIES = {
+    'residues': ('residues',),
+    'rg': ('rg',),
+    'rg_normalized': ('rg_normalized',),
+    'hydrophobicity': ('hydrophobicity',),
+    'msl': ('msl_length', 'msl_mean', 'msl_max'),
+    'screw_centers': ('n_screw_centers', 'screw_centers'),
+}
+
+
+def compute_properties(molecule, properties):
+    """
+    Parameters
+    ----------
+    molecule: Molecule
+    properties: list of str
+        names of PROPERTIES
+
+    Return
+    ------
+    dict
+        column: value
+    """
+    row = {}
+    for name in properties:
+        if name == 'residues':
+            row['residues'] = molecule.number_of_residues()
+        elif name == 'rg':
+            row['rg'] = float(molecule.radius_of_gyration())
+        elif name == 'rg_normalized':
+            row['rg_normalized'] = float(molecule.radius_of_gyration_normalized())
+        elif name == 'hydrophobicity':
+            hydrophobicity = molecule.hydrophobicity()
+            # 'NaN' if a residue is unknown
+            row['hydrophobicity'] = None if hydrophobicity == 'NaN' else hydrophobicity
+        elif name == 'msl':
+            msl = molecule.msl_fft(molecule.calpha_coordinates)
+            row['msl_length'] = len(msl)
+            row['msl_mean'] = float(msl.mean())
+            row['msl_max'] = float(msl.max())
+        elif name == 'screw_centers':
+            centers = molecule.screw_centers().screwframe_centers
+            row['n_screw_centers'] = len(centers)
+            row['screw_centers'] = centers.round(4).tolist()
+    return row
+
+
+def _is_transient(error, offline=False):
+    """
+    True if the error may not happen again (network, file system, memory): the entry is
+    processed again when the run is resumed. An unknown PDB id (HTTP 404), a file which
+    is still invalid after all the retries, or a missing file with --offline are final.
+    """
+    from pdbpy.download import DownloadError, TransientDownloadError
+    if isinstance(error, DownloadError):
+        return isinstance(error, TransientDownloadError)
+    if isinstance(error, FileNotFoundError) and offline:
+        return False
+    if isinstance(error, (OSError, MemoryError)):
+        return True
+    # urllib3 is only loaded if a file has been downloaded
+    urllib3 = sys.modules.get('urllib3')
+    return urllib3 is not None and isinstance(error, urllib3.exceptions.HTTPError)
+
+
+def _analyze(entry, properties, offline=False):
+    """
+    Row of results of an entry, and False if it failed with a transient error
+    """
+    # Imported here: the workers import it, the main process only reads and writes rows
+    from pdbpy.molecule import Molecule
+    row = {'entry': entry}
+    download_from_pdb = not offline and not os.path.isfile(entry)
+    try:
+        row.update(compute_properties(Molecule(entry, download_from_pdb), properties))
+    except SystemExit:
+        # Molecule exits for DNA/RNA molecules and for files without ATOM records
+        row['error'] = 'not analyzed (DNA/RNA molecule or no ATOM record)'
+    except Exception as error:
+        row['error'] = '{}: {}'.format(type(error).__name__, error)
+        return row, not _is_transient(error, offline)
+    return row, True
+
+
+def analyze(entry, properties, offline=False):
+    """
+    Row of results of an entry (PDB id or path of a pdb file). Errors are reported
+    in the column 'error' rather than raised, so that a batch is never interrupted.
+    """
+    return _analyze(entry, properties, offline)[0]
+
+
+def read_entries(input):
+    """
+    Entries of the input file, one per line (blank lines and lines starting with # are ignored)
+    """
+    for line in input:
+        entry = line.strip()
+        if entry and entry[0] != '#':
+            yield entry
+
+
+class Checkpoint:
+    """
+    Entries already written, stored with a constant memory: all the entries before
+    'done' (position in the input) are written, plus the positions in 'done_after'
+    (at most the number of entries processed at the same time). The entries in 'retry'
+    failed with a transient error (download, network...): they are processed again
+    when the run is resumed.
+
+    The file is written every save_rows entries or every save_interval seconds, and by
+    save: after an interruption, the last entries written may be analyzed again.
+    """
+    def __init__(self, file_name=None, save_rows=SAVE_ROWS, save_interval=SAVE_INTERVAL):
+        self.file_name = file_name
+        self.save_rows = save_rows
+        self.save_interval = save_interval
+        self.unsaved = 0
+        self.last_save = time.monotonic()
+        self.done = 0
+        self.done_after = set()
+        self.retry = set()
+        if file_name is not None and os.path.exists(file_name):
+            with open(file_name, 'r') as input:
+                state = json.load(input)
+            self.done = state['done']
+            self.done_after = set(state['done_after'])
+            self.retry = set(state.get('retry', ()))
+
+    def is_done(self, position):
+        return (position < self.done or position in self.done_after) and position not in self.retry
+
+    def resumed(self):
+        return self.done > 0 or len(self.done_after) > 0
+
+    def add(self, position, retry=False):
+        """
+        retry: the entry failed with a transient error, it is processed again at the next run
+        """
+        if retry:
+            self.retry.add(position)
+        else:
+            self.retry.discard(position)
+        if position >= self.done:
+            self.done_after.add(position)
+        while self.done in self.done_after:
+            self.done_after.remove(self.done)
+            self.done += 1
+        self.unsaved += 1
+        if self.unsaved >= self.save_rows or time.monotonic() - self.last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """
+        Write the checkpoint file
+        """
+        self.unsaved = 0
+        self.last_save = time.monotonic()
+        if self.file_name is not None:
+            # written in a temporary file first, so an interruption never corrupts the checkpoint
+            temporary = self.file_name + '.tmp'
+            with open(temporary, 'w') as output:
+                json.dump({'done': self.done, 'done_after': sorted(self.done_after),
+                           'retry': sorted(self.retry)}, output)
+            os.replace(temporary, self.file_name)
+
+
+class RowWriter:
+    """
+    Write the rows on a stream as JSON lines or CSV, flushed after each row
+    """
+    def __init__(self, stream, output_format, properties, header=True):
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == 'csv':
+            columns = ['entry'] + [c for name in properties for c in PROPERTIES[name]] + ['error']
+            self.writer = csv.DictWriter(stream, columns, restval='')
+            if header:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.output_format == 'csv':
+            if 'screw_centers' in row:
+                row = dict(row, screw_centers=json.dumps(row['screw_centers']))
+            self.writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(row) + '\n')
+        self.stream.flush()
+
+
+def run(entries, properties, writer, checkpoint, workers=1, offline=False):
+    """
+    Analyze the entries and write the rows as soon as they are ready. With several
+    workers, the number of entries submitted at the same time is bounded, so the
+    memory does not depend on the number of entries. The checkpoint is saved at the
+    end, even if the run is interrupted.
+    """
+    try:
+        _run(entries, properties, writer, checkpoint, workers, offline)
+    finally:
+        checkpoint.save()
+
+
+def _run(entries, properties, writer, checkpoint, workers=1, offline=False):
+    pending_entries = ((position, entry) for position, entry in enumerate(entries)
+                       if not checkpoint.is_done(position))
+    if workers == 1:
+        for position, entry in pending_entries:
+            row, final = _analyze(entry, properties, offline)
+            writer.write(row)
+            checkpoint.add(position, retry=not final)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    max_pending = 4 * workers
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {}
+        for position, entry in pending_entries:
+            while True:
+                try:
+                    futures[executor.submit(_analyze, entry, properties, offline)] = (position, entry)
+                    break
+                except BrokenProcessPool:
+                    executor = _new_pool(executor, futures, writer, checkpoint, workers)
+            if len(futures) >= max_pending and not _write_completed(futures, writer, checkpoint):
+                executor = _new_pool(executor, futures, writer, checkpoint, workers)
+        while futures:
+            _write_completed(futures, writer, checkpoint)
+    finally:
+        executor.shutdown()
+
+
+def _new_pool(executor, futures, writer, checkpoint, workers):
+    """
+    Write the remaining entries of a broken pool of workers (a worker died: killed,
+    out of memory...) and start a new pool for the next entries
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    while futures:
+        _write_completed(futures, writer, checkpoint)
+    executor.shutdown(wait=False)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _write_completed(futures, writer, checkpoint):
+    """
+    Wait for at least one of the futures, write and remove the completed ones
+
+    Return
+    ------
+    False if the pool of workers is broken
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+    from concurrent.futures.process import BrokenProcessPool
+    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+    usable = True
+    for future in done:
+        position, entry = futures.pop(future)
+        try:
+            row, final = future.result()
+        except BrokenProcessPool as error:
+            # all the entries of the broken pool fail: they are processed again at the next run
+            row, final = {'entry': entry, 'error': 'BrokenProcessPool: {}'.format(error)}, False
+            usable = False
+        writer.write(row)
+        checkpoint.add(position, retry=not final)
+    return usable
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pdbpy', description='Properties of the 1st chain of pdb files')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file with one PDB id or pdb file path per line (default: - for stdin)')
+    parser.add_argument('-p', '--properties', nargs='+', choices=list(PROPERTIES),
+                        default=['residues', 'rg'], help='properties to compute (default: residues rg)')
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl', dest='output_format')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of worker processes (default: 1)')
+    parser.add_argument('--offline', action='store_true',
+                        help='never download: the entries must be local pdb files')
+    parser.add_argument('--checkpoint',
+                        help='file storing the entries already written; an interrupted run '
+                             'started again with the same checkpoint skips them, except the '
+                             'entries which failed with a transient error (download, network). '
+                             'An entry can then have several rows: the last one counts')
+    args = parser.parse_args(argv)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    # No CSV header when resuming: the rows are appended to the previous output
+    writer = RowWriter(sys.stdout, args.output_format, args.properties, header=not checkpoint.resumed())
+    if args.input == '-':
+        run(read_entries(sys.stdin), args.properties, writer, checkpoint, args.workers, args.offline)
+    else:
+        with open(args.input, 'r') as input:
+            run(read_entries(input), args.properties, writer, checkpoint, args.workers, args.offline)
+
+
+if __name__ == '__main__':
+    main()
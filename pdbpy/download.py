@@ -1,31 +1,257 @@
-import urllib3
+## Download of the pdb files from the PDB
+##
+## The files are downloaded compressed (1dpx.pdb.gz) and decompressed on the fly, by chunks.
+## The ETag / Last-Modified of each downloaded file are kept in the metadata store
+## (directory METADATA_DIR, next to the files): a file which is downloaded again is only
+## transferred if it has changed on the server (If-None-Match / If-Modified-Since).
+## An interrupted transfer is resumed (Range) at the next attempt, the transient errors
+## are retried with an exponential backoff, and the file is only written (atomically)
+## once it is complete and valid: a failed download never leaves a partial file behind.
 
+import os
+import json
+import time
+import zlib
+from pdbpy.profiling import instrument, add_bytes_read
 
-def download_pdb(pdb_name):
+# URL of the PDB (can be replaced by a mirror or a local server)
+URL = 'https://files.rcsb.org/download/'
+METADATA_DIR = '.pdbpy_downloads'
+CHUNK_SIZE = 1 << 16
+# seconds (connection and between 2 chunks)
+TIMEOUT = 30.
+RETRIES = 4
+# seconds, doubled at each retry
+BACKOFF = 0.5
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class DownloadError(IOError):
+    """
+    The pdb file cannot be downloaded (unknown file, invalid content, too many errors)
+
+    status: HTTP status of the response, None if there is no response with an error status
+    """
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TransientDownloadError(DownloadError):
+    """
+    The pdb file cannot be downloaded now (connection, timeout, HTTP 5xx...): all the
+    retries have failed, but the download may succeed later
+    """
+
+
+class _Incomplete(Exception):
+    """
+    Transient error: the download is attempted again (and resumed if possible)
+    """
+
+
+class _Invalid(_Incomplete):
+    """
+    The content received is not a valid file: attempted again, but not transient if
+    it is still invalid after the last retry
+    """
+
+
+def _downloaded_file(pdb_name, file_format='pdb'):
+    if pdb_name[-4:] in ('.pdb', '.cif'):
+        return pdb_name
+    return pdb_name + '.' + file_format
+
+
+def _metadata_file(file_name, suffix='.json'):
+    directory, name = os.path.split(file_name)
+    return os.path.join(directory, METADATA_DIR, name + suffix)
+
+
+def _read_metadata(file_name):
+    try:
+        with open(_metadata_file(file_name), 'r') as input:
+            return json.load(input)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_metadata(file_name, metadata):
+    path = _metadata_file(file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written in a temporary file first, so an interruption never corrupts the metadata
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'w') as output:
+        json.dump(metadata, output)
+    os.replace(temporary, path)
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _is_valid(path, file_format):
+    """
+    Check that the content is a complete pdb (END record at the end) or mmCIF (data_ block) file
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return False
+    with open(path, 'rb') as input:
+        if file_format == 'cif':
+            return input.read(5) == b'data_'
+        input.seek(max(size - 256, 0))
+        lines = input.read().rstrip().splitlines()
+        return len(lines) > 0 and lines[-1].startswith(b'END')
+
+
+def _fetch(http, url, file_name, compressed, metadata):
+    """
+    One attempt: conditional request, or request of the rest of a partial transfer
+
+    Return
+    ------
+    dict
+        metadata of the file, or None if the local file is up to date
+    """
+    part = _metadata_file(file_name, '.gz.part' if compressed else '.part')
+    partial = metadata.get('partial', {})
+    offset = os.path.getsize(part) if partial.get('url') == url and os.path.exists(part) else 0
+    headers = {}
+    if offset:
+        headers['Range'] = 'bytes={}-'.format(offset)
+        # the rest is sent only if the file has not changed since the beginning of the transfer
+        if partial.get('etag') or partial.get('last_modified'):
+            headers['If-Range'] = partial.get('etag') or partial.get('last_modified')
+    elif (metadata.get('url') == url and os.path.exists(file_name)
+          and os.path.getsize(file_name) == metadata.get('size')):
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+
+    response = http.request('GET', url, headers=headers, preload_content=False)
+    try:
+        if response.status == 304:
+            return None
+        if response.status in RETRY_STATUS:
+            raise _Incomplete('HTTP status {}'.format(response.status))
+        if response.status == 416:
+            # the partial file is not a prefix of the file on the server any more
+            _remove(part)
+            raise _Incomplete('HTTP status 416')
+        if response.status not in (200, 206) or (response.status == 206 and not offset):
+            raise DownloadError('Unable to download {}: HTTP status {}'.format(url, response.status),
+                                response.status)
+        if response.status == 200:
+            offset = 0
+        validators = {'url': url, 'etag': response.headers.get('ETag'),
+                      'last_modified': response.headers.get('Last-Modified')}
+        if not offset:
+            metadata['partial'] = validators
+            _write_metadata(file_name, metadata)
+
+        # decompressed file (the partial file itself if the transfer is not compressed)
+        output = _metadata_file(file_name, '.tmp') if compressed else part
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compressed else None
+        expected = response.headers.get('Content-Length')
+        received = 0
+        with open(part, 'ab' if offset else 'wb') as raw:
+            out = open(output, 'wb') if compressed else None
+            try:
+                if offset and compressed:
+                    # the bytes received before the interruption are decompressed again
+                    with open(part, 'rb') as previous:
+                        for chunk in iter(lambda: previous.read(CHUNK_SIZE), b''):
+                            out.write(decompressor.decompress(chunk))
+                for chunk in response.stream(CHUNK_SIZE, decode_content=False):
+                    raw.write(chunk)
+                    received += len(chunk)
+                    # bytes transferred (compressed), including the failed attempts
+                    add_bytes_read(len(chunk))
+                    if compressed:
+                        out.write(decompressor.decompress(chunk))
+            except zlib.error as error:
+                _remove(part)
+                raise _Invalid('invalid compressed data: {}'.format(error))
+            finally:
+                if out is not None:
+                    out.close()
+        if expected is not None and received != int(expected):
+            raise _Incomplete('{} bytes received instead of {}'.format(received, expected))
+        if (compressed and not decompressor.eof) or not _is_valid(output, file_name[-3:]):
+            _remove(part, output)
+            raise _Invalid('invalid content')
+    finally:
+        response.release_conn()
+
+    os.replace(output, file_name)
+    _remove(part)
+    validators['size'] = os.path.getsize(file_name)
+    return validators
+
+
+@instrument('download')
+def download_pdb(pdb_name, file_format='pdb', compressed=True, url=None, timeout=TIMEOUT, retries=RETRIES):
     """
     Download a pdb file from the PDB. Need an internet connection.
+    If the file has already been downloaded, it is only downloaded again if it has
+    changed on the server.
 
     Parameters
     ----------
-    Name of the pdb file. (ex: 1dpx or 1dpx.pdb) 
+    pdb_name:
+        Name of the pdb file. (ex: 1dpx, 1dpx.pdb or 1dpx.cif)
+
+    file_format:
+        'pdb' (default) or 'cif' (mmCIF format, needed for the largest structures).
+        If pdb_name ends with .pdb or .cif, the extension gives the format.
+
+    compressed: bool, default is True
+        Download the gzip file (1dpx.pdb.gz) and decompress it
+
+    url: str, default is None
+        URL of the directory of the files (default: URL, the PDB)
+
+    timeout: float
+        Timeout (s) of the connection and of the reading of each chunk
+
+    retries: int
+        Number of retries after a transient error (connection, timeout, HTTP 5xx...)
 
     Return
     ------
     The pdb file
+
+    Raise
+    -----
+    TransientDownloadError if all the attempts failed with transient errors, DownloadError
+    for the other errors (unknown file, invalid content after all the retries...)
     """
-    # URL of the PDB
-    url = 'http://files.rcsb.org/download/'
-    if pdb_name[-4:] == '.pdb':
-        file_name = pdb_name
-    else:
-        file_name = pdb_name + '.pdb'
-    http = urllib3.PoolManager()
-    url = url + file_name
-    req = http.request('GET', url, preload_content = False)
-    with open(file_name, 'wb') as out:
-        while True:
-            data = req.read()
-            if not data:
-                break
-            out.write(data)
-    req.release_conn()
+    file_name = _downloaded_file(pdb_name, file_format)
+    url = (URL if url is None else url) + os.path.basename(file_name) + ('.gz' if compressed else '')
+    # urllib3 is imported only when a file is downloaded: the analysis of local files
+    # does not load the networking modules
+    import urllib3
+    # the redirections are followed, the errors are retried below (to resume the transfer)
+    http = urllib3.PoolManager(timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                               retries=urllib3.Retry(total=None, connect=0, read=0, redirect=5))
+    metadata = _read_metadata(file_name)
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(BACKOFF * 2 ** (attempt - 1))
+        try:
+            validators = _fetch(http, url, file_name, compressed, metadata)
+        except (_Incomplete, urllib3.exceptions.HTTPError) as error:
+            last_error = error
+            continue
+        if validators is not None:
+            _write_metadata(file_name, validators)
+        return file_name
+    _remove(_metadata_file(file_name, '.tmp'))
+    message = 'Unable to download {} ({} attempts): {}'.format(url, retries + 1, last_error)
+    if isinstance(last_error, _Invalid):
+        raise DownloadError(message)
+    raise TransientDownloadError(message)
@@ -0,0 +1,154 @@
+## Export of the 1st chain of pdb files to several outputs, reading each pdb file only once
+
+import os
+import numpy as np
+from pdbpy.download import download_pdb
+from pdbpy.profiling import instrument, open_file
+
+# Size of the read buffer (bytes)
+BUFFER_SIZE = 1 << 20
+
+# Available outputs and suffix of the corresponding file
+#   coordinates: ATOM records of the 1st chain (text, coordinates in Angstrom)
+#   calpha: ATOM records of the carbon alpha of the 1st chain (text, coordinates in Angstrom)
+#   npy: coordinates array (nanometers), same as extract_coordinates
+#   calpha_npy: carbon alpha coordinates array (nanometers), same as extract_calpha_coordinates
+#   npz: bundle of the coordinates and carbon alpha coordinates arrays (nanometers)
+OUTPUTS = {'coordinates': '_coordinates.pdb',
+           'calpha': '_calpha.pdb',
+           'npy': '_coordinates.npy',
+           'calpha_npy': '_calpha.npy',
+           'npz': '.npz'}
+
+
+@instrument('extract', atoms=lambda result: len(result[0]))
+def read_first_chain(pdb_file):
+    """
+    Read the ATOM records of the 1st chain, in a single pass
+
+    Parameters
+    ----------
+    pdb_file:
+        Path of the pdb file
+
+    Return
+    ------
+    atom_lines: list of str
+        ATOM records of the 1st chain (first position of the alternate locations only)
+    calpha_index: list of int
+        Index in atom_lines of the carbon alpha
+    """
+    atom_lines = []
+    calpha_index = []
+    with open_file(pdb_file, 'r', buffering=BUFFER_SIZE) as input:
+        for line in input:
+            # Save only the 1st chain
+            if line[:3] == 'TER':
+                break
+            # Only the first position of the alternate locations (see extract_coordinates)
+            if line[:4] == 'ATOM' and (line[16] == ' ' or line[16] == 'A'):
+                if line[13:15] == 'CA':
+                    calpha_index.append(len(atom_lines))
+                atom_lines.append(line)
+    return atom_lines, calpha_index
+
+
+def lines_to_coordinates(atom_lines):
+    """
+    Coordinates of ATOM records
+
+    Return
+    ------
+    coordinates: numpy array, dimension: (n, 3)
+                coordinates in nanometers
+    """
+    coordinates = [[float(line[30:38]), float(line[38:46]), float(line[46:54])] for line in atom_lines]
+    # Divide by 10, so coordinates are in nanometers
+    return np.array(coordinates) / 10
+
+
+@instrument('export')
+def export(pdb_name, outputs=('coordinates', 'calpha'), download_from_pdb=True, output_dir=None):
+    """
+    Export the 1st chain of a pdb file to several outputs. The pdb file is read only once.
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the pdb file. (ex: 1dpx or 1dpx.pdb)
+
+    outputs: list of str
+        default is ('coordinates', 'calpha'). See OUTPUTS for the available outputs.
+        The name of each output file is the name of the pdb file followed by the suffix
+        of OUTPUTS (ex: 1dpx_coordinates.pdb, 1dpx_calpha.pdb, 1dpx.npz)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local pdb file.
+
+    output_dir:
+        default is None (output files are written next to the pdb file).
+        Directory of the output files.
+
+    Return
+    ------
+    dict
+        output: name of the output file
+    """
+    for output in outputs:
+        if output not in OUTPUTS:
+            raise ValueError('Unknown output {}. Available outputs: {}'.format(output, ', '.join(OUTPUTS)))
+    if download_from_pdb:
+        download_pdb(pdb_name)
+    if pdb_name[-4:] == '.pdb':
+        pdb_file = pdb_name
+        output_name = pdb_name[:-4]
+    else:
+        pdb_file = pdb_name + '.pdb'
+        output_name = pdb_name
+    if output_dir is not None:
+        output_name = os.path.join(output_dir, os.path.basename(output_name))
+
+    atom_lines, calpha_index = read_first_chain(pdb_file)
+    if 'npy' in outputs or 'calpha_npy' in outputs or 'npz' in outputs:
+        coordinates = lines_to_coordinates(atom_lines)
+        calpha_coordinates = coordinates[calpha_index]
+
+    file_names = {}
+    for output in outputs:
+        file_name = output_name + OUTPUTS[output]
+        # Text outputs are written with a single call
+        if output == 'coordinates':
+            with open(file_name, 'w') as out:
+                out.write(''.join(atom_lines))
+        elif output == 'calpha':
+            with open(file_name, 'w') as out:
+                out.write(''.join([atom_lines[i] for i in calpha_index]))
+        elif output == 'npy':
+            np.save(file_name, coordinates)
+        elif output == 'calpha_npy':
+            np.save(file_name, calpha_coordinates)
+        elif output == 'npz':
+            np.savez(file_name, coordinates=coordinates, calpha_coordinates=calpha_coordinates)
+        file_names[output] = file_name
+    return file_names
+
+
+def export_files(pdb_names, outputs=('coordinates', 'calpha'), download_from_pdb=True, output_dir=None):
+    """
+    Export the 1st chain of several pdb files (see export)
+
+    Parameters
+    ----------
+    pdb_names: list of str
+        Names of the pdb files. (ex: ['1dpx', '5kxk.pdb'])
+
+    outputs, download_from_pdb, output_dir:
+        see export
+
+    Return
+    ------
+    list of dict
+        for each pdb file, output: name of the output file
+    """
+    return [export(pdb_name, outputs, download_from_pdb, output_dir) for pdb_name in pdb_names]
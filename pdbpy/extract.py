@@ -1,7 +1,10 @@
 import numpy as np
 from pdbpy.download import download_pdb
+from pdbpy.export import export
+from pdbpy.profiling import instrument, open_file
 
 
+@instrument('extract', atoms=len)
 def extract_coordinates(pdb_name, download_from_pdb=True):
     """
     Extracting the lines containing the coordinates of the 1st chain
@@ -28,7 +31,7 @@ def extract_coordinates(pdb_name, download_from_pdb=True):
         pdb_file = pdb_name + '.pdb'
 
     coordinates = []
-    with open(pdb_file, 'r') as input:
+    with open_file(pdb_file, 'r') as input:
         for line in input:
             # Save only the 1st chain
             if line[:3] == 'TER':
@@ -45,6 +48,7 @@ def extract_coordinates(pdb_name, download_from_pdb=True):
     return np.array(coordinates) / 10
 
 
+@instrument('extract', atoms=len)
 def extract_calpha_coordinates(pdb_name, download_from_pdb=True):
     """
     Extracting the lines containing the carbon alpha coordinates of the 1st chain
@@ -71,7 +75,7 @@ def extract_calpha_coordinates(pdb_name, download_from_pdb=True):
         pdb_file = pdb_name + '.pdb'
 
     coordinates = []
-    with open(pdb_file, 'r') as input:
+    with open_file(pdb_file, 'r') as input:
         for line in input:
             # Save only the 1st chain
             if line[:3] == 'TER':
@@ -92,6 +96,7 @@ def extract_calpha_coordinates(pdb_name, download_from_pdb=True):
 def extract_coordinates_to_file(pdb_name, download_from_pdb=True):
     """
     Extracting the lines containing the coordinates of the 1st chain
+    (to write several outputs from a single reading of the pdb file, use pdbpy.export.export)
 
     Parameters
     ----------
@@ -106,32 +111,12 @@ def extract_coordinates_to_file(pdb_name, download_from_pdb=True):
     ------
     A text file (note that the coordinates are in Angstrom)
     """
-    if download_from_pdb:
-        download_pdb(pdb_name)
-    if pdb_name[-4:] == '.pdb':
-        pdb_file = pdb_name
-        output_name = pdb_name[:-4]
-    else:
-        pdb_file = pdb_name + '.pdb'
-        output_name = pdb_name
-
-    with open(pdb_file, 'r') as input, open (output_name+'_coordinates.pdb', 'w') as output:
-        for line in input:
-            # Save only the 1st chain
-            if line[:3] == 'TER':
-                break
-            if line[:4] == 'ATOM':
-                # Sometimes in X-ray cristallography, one sees superposition of 
-                # differents positions for each atom. We will extract only the first position
-                # The different positions are denoted with a letter preceding the residue name 
-                # in column 17. Note the column 55-60 (field "occupancy") correspond to a reduced 
-                # electronic density for each atom
-                if line[16] == ' ' or line[16] == 'A': 
-                    output.write(line)
+    export(pdb_name, ['coordinates'], download_from_pdb)
 
 def extract_calpha_coordinates_to_file(pdb_name, download_from_pdb=True):
     """
     Extracting the lines containing the carbon alpha coordinates of the 1st chain
+    (to write several outputs from a single reading of the pdb file, use pdbpy.export.export)
 
     Parameters
     ----------
@@ -146,27 +131,4 @@ def extract_calpha_coordinates_to_file(pdb_name, download_from_pdb=True):
     ------
     A text file (note that the coordinates are in Angstrom)
     """
-    if download_from_pdb:
-        download_pdb(pdb_name)
-    if pdb_name[-4:] == '.pdb':
-        pdb_file = pdb_name
-        output_name = pdb_name[:-4]
-    else:
-        pdb_file = pdb_name + '.pdb'
-        output_name = pdb_name
-
-    with open(pdb_file, 'r') as input, open (output_name+'_calpha.pdb', 'w') as output:
-        for line in input:
-            # Save only the 1st chain
-            if line[:3] == 'TER':
-                break
-            if line[:4] == 'ATOM':
-                if line[13:15] == 'CA':
-                    # Sometimes in X-ray cristallography, one sees superposition of 
-                    # differents positions for each atom. We will extract only the first position
-                    # The different positions are denoted with a letter preceding the residue name 
-                    # in column 17. Note the column 55-60 (field "occupancy") correspond to a reduced 
-                    # electronic density for each atom
-                    if line[16] == ' ' or line[16] == 'A': 
-                        output.write(line)
-
+    export(pdb_name, ['calpha'], download_from_pdb)
@@ -1,4 +1,6 @@
 import numpy as np
+from pdbpy.profiling import instrument
+from pdbpy import backends
 
 def norm(v):
     """
@@ -39,6 +41,7 @@ def normalize(vectors):
         return NotImplemented
     return unit_vectors 
 
+@instrument('screwframe')
 def screw_motion(quaternions, translations):
     """
     Compute screw parameters from quaternions and translation
@@ -59,6 +62,11 @@ def screw_motion(quaternions, translations):
         phi: angle of the rotation around the axis
         d: scalar displacement along the axis
     """
+    return backends.get('screw_motion', len(quaternions))(quaternions, translations)
+
+
+@backends.register('screw_motion', 'reference')
+def _screw_motion_reference(quaternions, translations):
     results = []
     for q, t in zip(quaternions, translations):
         cosphi2 = q[0]
@@ -92,3 +100,23 @@ def screw_motion(quaternions, translations):
         results.append((r0, axis, phi, d))
     return results
 
+
+def distance_matrix(points):
+    """
+    Distances between all the pairs of points
+
+    Parameter
+    ---------
+    points: numpy array, dimension: (n, 3)
+
+    Return
+    ------
+    numpy array, dimension: (n, n)
+    """
+    return backends.get('distance_matrix', len(points))(points)
+
+
+@backends.register('distance_matrix', 'reference')
+def _distance_matrix_reference(points):
+    # one row of the matrix at a time
+    return np.array([np.sqrt(((points - p)**2).sum(axis=1)) for p in points]).reshape(len(points), len(points))
@@ -0,0 +1,246 @@
+## Incremental update of the screwframe rotation centers and of the MSL of a chain
+## which is edited or extended a few residues at a time.
+##
+## Dependencies between the quantities (i: index of the C-alpha atom):
+##     Frenet basis i          <- C-alpha i, i+1, i+2
+##     quaternion, center j    <- Frenet bases j, j+1 and C-alpha j+1, j+2 (C-alpha j to j+3)
+## so editing the C-alpha k only changes the Frenet bases k-2 to k and the centers k-3 to k.
+
+import numpy as np
+from pdbpy.screwframe import frenet_bases, frame_rotation_and_distance
+from pdbpy.geometry import screw_motion
+from pdbpy.msd import msd_fft
+
+
+class _GrowingArray:
+    """
+    Array whose capacity is doubled when it is full, so that appending
+    values costs (on average) in proportion to the number of values appended
+    """
+    def __init__(self, values, shape=()):
+        values = np.asarray(values, dtype=float).reshape((-1,) + shape)
+        self.size = len(values)
+        self._data = np.empty((max(2 * self.size, 16),) + shape)
+        self._data[:self.size] = values
+
+    def view(self):
+        return self._data[:self.size]
+
+    def resize(self, size):
+        if size > len(self._data):
+            data = np.empty((max(2 * len(self._data), size),) + self._data.shape[1:])
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+        self.size = size
+
+    def extend(self, values):
+        start = self.size
+        self.resize(start + len(values))
+        self._data[start:self.size] = values
+
+
+class IncrementalMSD:
+    """
+    Mean square displacement (see pdbpy.msd) of points which are modified or appended.
+
+    The sums of the square distances at each lag are kept: modifying or appending a point
+    changes one pair of points at each lag, so the update of the MSD costs O(n) per point
+    (n: number of points, vectorized) instead of O(n log n) for the whole FFT calculation.
+    """
+    def __init__(self, points):
+        self._points = _GrowingArray(points, (3,))
+        self.recompute()
+
+    def recompute(self):
+        """
+        Compute again all the sums (with FFT), to remove the accumulated rounding errors
+        """
+        points = self._points.view()
+        n = len(points)
+        self._sums = _GrowingArray(msd_fft(points) * (n - np.arange(n)) if n else [])
+
+    def __len__(self):
+        return self._points.size
+
+    def set(self, index, points):
+        """
+        Replace the points index to index + len(points)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if index < 0 or index + len(points) > len(self):
+            raise IndexError('points {} to {} do not exist'.format(index, index + len(points) - 1))
+        current = self._points.view()
+        sums = self._sums.view()
+        n = len(current)
+        # One point at a time: the pairs of 2 modified points are updated with the new positions
+        for k, point in zip(range(index, index + len(points)), points):
+            delta = np.square(current - point).sum(axis=1) - np.square(current - current[k]).sum(axis=1)
+            # pairs (k - lag, k) and (k, k + lag)
+            sums[1:k + 1] += delta[:k][::-1]
+            sums[1:n - k] += delta[k + 1:]
+            current[k] = point
+
+    def append(self, points):
+        """
+        Append points at the end
+        """
+        for point in np.asarray(points, dtype=float).reshape(-1, 3):
+            current = self._points.view()
+            n = len(current)
+            self._sums.extend([0.])
+            # pairs (n - lag, n)
+            self._sums.view()[1:n + 1] += np.square(current - point).sum(axis=1)[::-1]
+            self._points.extend([point])
+
+    def msd(self):
+        """
+        Return
+        ------
+        np.ndarray
+            same as pdbpy.msd.msd_fft for the current points
+        """
+        n = len(self)
+        return self._sums.view() / (n - np.arange(n))
+
+
+class IncrementalScrewFrame:
+    """
+    Screwframe rotation centers and MSL of a chain of C-alpha atoms, updated when
+    the chain is edited (update) or extended (extend). An update only computes
+    again the Frenet bases, quaternions and centers which depend on the modified atoms.
+
+    Example
+    -------
+    chain = IncrementalScrewFrame(calphas)
+    chain.update(10, new_positions)      # C-alpha 10 to 10 + len(new_positions) - 1
+    chain.extend(new_residues)
+    centers, msl = chain.screw_centers(), chain.msl()
+    """
+    def __init__(self, calphas, msl='calpha'):
+        """
+        Parameters
+        ----------
+        calphas: np.ndarray
+            Coordinates of the successive C-alpha atoms
+        msl: str, default is 'calpha'
+            MSL of the C-alpha atoms ('calpha') or of the screwframe rotation centers ('screw_centers')
+        """
+        if msl not in ('calpha', 'screw_centers'):
+            raise ValueError("msl must be 'calpha' or 'screw_centers'")
+        self._msl_of = msl
+        self._calphas = _GrowingArray(calphas, (3,))
+        self._tangents = _GrowingArray([], (3,))
+        self._normals = _GrowingArray([], (3,))
+        self._quaternions = _GrowingArray([], (4,))
+        self._centers = _GrowingArray([], (3,))
+        self._compute(0, len(self._calphas.view()))
+        if msl == 'calpha':
+            self._msd = IncrementalMSD(self._calphas.view())
+        else:
+            self._msd = IncrementalMSD(self._centers.view())
+
+    def __len__(self):
+        return self._calphas.size
+
+    @property
+    def calphas(self):
+        return self._calphas.view()
+
+    @property
+    def frenet_bases(self):
+        """
+        Same as pdbpy.screwframe.frenet_bases(calphas)
+        """
+        return np.array([self._tangents.view(), self._normals.view()])
+
+    @property
+    def quaternions(self):
+        """
+        Quaternions describing the rotations between the successive Frenet bases
+        """
+        return self._quaternions.view()
+
+    def _compute(self, start, end):
+        """
+        Compute the Frenet bases, quaternions and centers depending on the C-alpha atoms
+        start to end - 1 (the arrays are extended if needed)
+        """
+        calphas = self._calphas.view()
+        n = len(calphas)
+        # Frenet bases: start - 2 to end - 1
+        b0, b1 = max(start - 2, 0), min(end, n - 2)
+        self._tangents.resize(max(n - 2, 0))
+        self._normals.resize(max(n - 2, 0))
+        if b1 > b0:
+            fbs = frenet_bases(calphas[b0:b1 + 2])
+            self._tangents.view()[b0:b1] = fbs[0]
+            self._normals.view()[b0:b1] = fbs[1]
+        # Quaternions and centers: start - 3 to end - 1
+        c0, c1 = max(start - 3, 0), min(end, n - 3)
+        self._quaternions.resize(max(n - 3, 0))
+        self._centers.resize(max(n - 3, 0))
+        if c1 <= c0:
+            return c0, c0
+        fbs = np.array([self._tangents.view()[c0:c1 + 1], self._normals.view()[c0:c1 + 1]])
+        q = np.array([q for q, delta in frame_rotation_and_distance(fbs)])
+        t = calphas[c0 + 2:c1 + 2] - calphas[c0 + 1:c1 + 1]
+        r0 = np.array([r0 for r0, axis, phi, d in screw_motion(q, t)])
+        self._quaternions.view()[c0:c1] = q
+        # the center is the point on the screw axis that is closest to the C-alpha atom
+        self._centers.view()[c0:c1] = calphas[c0 + 1:c1 + 1] + r0
+        return c0, c1
+
+    def update(self, index, calphas):
+        """
+        Replace the C-alpha atoms index to index + len(calphas) - 1
+
+        Parameters
+        ----------
+        index: int
+        calphas: np.ndarray
+            New coordinates of the C-alpha atoms
+        """
+        calphas = np.asarray(calphas, dtype=float).reshape(-1, 3)
+        if index < 0 or index + len(calphas) > len(self):
+            raise IndexError('C-alpha atoms {} to {} do not exist'.format(index, index + len(calphas) - 1))
+        if self._msl_of == 'calpha':
+            self._msd.set(index, calphas)
+        self._calphas.view()[index:index + len(calphas)] = calphas
+        c0, c1 = self._compute(index, index + len(calphas))
+        if self._msl_of == 'screw_centers' and c1 > c0:
+            self._msd.set(c0, self._centers.view()[c0:c1])
+        return self
+
+    def extend(self, calphas):
+        """
+        Append C-alpha atoms at the end of the chain
+        """
+        calphas = np.asarray(calphas, dtype=float).reshape(-1, 3)
+        start = len(self)
+        n_centers = self._centers.size
+        self._calphas.extend(calphas)
+        if self._msl_of == 'calpha':
+            self._msd.append(calphas)
+        self._compute(start, len(self))
+        if self._msl_of == 'screw_centers':
+            # the centers which existed before are not changed by the new atoms
+            self._msd.append(self._centers.view()[n_centers:])
+        return self
+
+    def screw_centers(self):
+        """
+        Return
+        ------
+        np.ndarray
+            same as pdbpy.screwframe.screwframe_rotation_centers(calphas)
+        """
+        return self._centers.view().copy()
+
+    def msl(self):
+        """
+        Return
+        ------
+        np.ndarray
+            same as pdbpy.msd.msd_fft of the C-alpha atoms (or of the screwframe rotation centers)
+        """
+        return self._msd.msd()
@@ -1,7 +1,8 @@
-import re
 from pdbpy.download import download_pdb
+from pdbpy.profiling import instrument, open_file
 
 
+@instrument('inspection')
 def is_dna_or_rna(pdb_name, download_from_pdb=True):
     """
     Test if the the pdb file corresponds to a DNA or RNA structure 
@@ -28,15 +29,18 @@ def is_dna_or_rna(pdb_name, download_from_pdb=True):
         pdb_file = pdb_name + '.pdb'
 
     result = False
-    with open(pdb_file, 'r') as input:
+    with open_file(pdb_file, 'r') as input:
         for line in input:
+            # COMPND and KEYWDS are header records: the coordinates are not read
+            if line[:6] in ('ATOM  ', 'HETATM', 'MODEL '):
+                break
             # Save only the 1st chain
             if line[:10] == 'COMPND   2':
-                if re.search(r'DNA', line) or re.search(r'RNA', line):
+                if 'DNA' in line or 'RNA' in line:
                     result = True
                     break
             if line[:6] == 'KEYWDS':
-                if re.search(r'DNA', line) or re.search(r'RNA', line):
+                if 'DNA' in line or 'RNA' in line:
                     result = True
                     break
     return result
@@ -0,0 +1,115 @@
+## Vectorized NumPy backends of the numerical kernels (see pdbpy.backends)
+## Same results as the reference implementations, without Python loops over the atoms.
+
+import numpy as np
+from pdbpy.backends import register
+
+
+def _normalize_rows(vectors):
+    return vectors / np.sqrt((vectors * vectors).sum(axis=1))[:, None]
+
+
+@register('frenet_bases', 'numpy', minimum_size=4)
+def frenet_bases(points):
+    # tangent vectors ("point_after - point_before")
+    t = _normalize_rows(points[2:] - points[:-2])
+    # normal vectors ("point_after - point_current" without its component along t)
+    da = points[2:] - points[1:-1]
+    n = _normalize_rows(da - (da * t).sum(axis=1)[:, None] * t)
+    return np.array([t, n])
+
+
+def _k_matrices(s, d):
+    """
+    Matrices k of frame_rotation_and_distance for all the pairs of successive bases
+    (s: sum, d: difference of the vectors of the 2 bases)
+    """
+    k = np.zeros((len(s), 4, 4))
+    k[:, 0, 1:] = d
+    k[:, 1:, 0] = -d
+    k[:, 1, 2], k[:, 1, 3] = s[:, 2], -s[:, 1]
+    k[:, 2, 1], k[:, 2, 3] = -s[:, 2], s[:, 0]
+    k[:, 3, 1], k[:, 3, 2] = s[:, 1], -s[:, 0]
+    return k
+
+
+def rotation_matrices(fbs):
+    """
+    Matrices m of frame_rotation_and_distance, dimension: (number of bases - 1, 4, 4)
+    """
+    tangents, normals = fbs[0], fbs[1]
+    k = _k_matrices(tangents[:-1] + tangents[1:], tangents[:-1] - tangents[1:])
+    m = np.matmul(k.transpose(0, 2, 1), k)
+    k = _k_matrices(normals[:-1] + normals[1:], normals[:-1] - normals[1:])
+    m += np.matmul(k.transpose(0, 2, 1), k)
+    return m
+
+
+def quaternions_and_distances(m):
+    """
+    Quaternions (eigenvector of the smallest eigenvalue, with q[0] >= 0) and angular
+    distances from the matrices m of frame_rotation_and_distance
+    """
+    if len(m) == 0:
+        return []
+    # eigenvalues are in ascending order
+    l, vs = np.linalg.eigh(m)
+    q = vs[:, :, 0]
+    q[q[:, 0] < 0] *= -1
+    delta = np.sqrt(m[:, 0, 0] / 8.)
+    return list(zip(q, delta))
+
+
+@register('frame_rotation_and_distance', 'numpy', minimum_size=2)
+def frame_rotation_and_distance(fbs):
+    return quaternions_and_distances(rotation_matrices(fbs))
+
+
+@register('screw_motion', 'numpy', minimum_size=8)
+def screw_motion(quaternions, translations):
+    q = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+    t = np.asarray(translations, dtype=float).reshape(-1, 3)
+    cosphi2 = q[:, 0]
+    translation = np.abs(cosphi2 - 1.) < 1.e-6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phi = 2. * np.arccos(np.clip(cosphi2, -1., 1.))
+        sinphi2 = np.sqrt(1. - cosphi2 * cosphi2)
+        axis = q[:, 1:] / sinphi2[:, None]
+        d = (t * axis).sum(axis=1)
+        # direction of the axis such that the scalar displacement is positive
+        sign = np.where(d < 0, -1., 1.)
+        d, phi, sinphi2 = sign * d, sign * phi, sign * sinphi2
+        axis = sign[:, None] * axis
+        x = t - d[:, None] * axis
+        r0 = 0.5 * (x - (cosphi2 / sinphi2)[:, None] * np.cross(axis, x))
+        # No rotation, pure translation: axis parallel to the translation
+        d_translation = np.sqrt((t[translation] ** 2).sum(axis=1))
+        axis[translation] = t[translation] / d_translation[:, None]
+    phi[translation] = 0.
+    r0[translation] = 0.
+    d[translation] = d_translation
+    return list(zip(r0, axis, phi, d))
+
+
+@register('msd', 'numpy', minimum_size=32)
+def msd(r):
+    # FFT algorithm of msd_fft (see pdbpy.msd), with the sum S1 computed without loop
+    from pdbpy.msd import autocorrfft
+    N = len(r)
+    D = np.square(r).sum(axis=1)
+    S2 = sum([autocorrfft(r[:, i]) for i in range(r.shape[1])])
+    # Q(m) = Q(m-1) - D(m-1) - D(N-m), with Q(-1) = 2 sum(D) and D(-1) = D(N) = 0
+    removed = np.concatenate(([0.], D[:-1])) + np.concatenate(([0.], D[:0:-1]))
+    Q = 2 * D.sum() - np.cumsum(removed)
+    S1 = Q / (N - np.arange(N))
+    return S1 - 2 * S2
+
+
+@register('distance_matrix', 'numpy', minimum_size=2)
+def distance_matrix(points):
+    # |p - q|^2 = |p|^2 + |q|^2 - 2 p.q
+    squares = (points * points).sum(axis=1)
+    distances = squares[:, None] + squares[None, :] - 2. * np.dot(points, points.T)
+    np.maximum(distances, 0., out=distances)
+    np.fill_diagonal(distances, 0.)
+    return np.sqrt(distances)
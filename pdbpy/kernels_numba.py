@@ -0,0 +1,147 @@
+## Numba backends of the numerical kernels (see pdbpy.backends)
+## Registered only if Numba is installed. Numba is imported, and each kernel compiled
+## (with a cache on disk), at the first call: small inputs never pay this cost.
+## Backends slower than the numpy ones (measured with benchmarks/check_backends.py)
+## are only used when forced (see pdbpy.backends.use_backend).
+
+import numpy as np
+from pdbpy.backends import register, MANUAL
+from pdbpy.kernels import quaternions_and_distances
+
+_compiled = {}
+
+
+def _jit(function):
+    def compiled(*args):
+        if function not in _compiled:
+            import numba
+            _compiled[function] = numba.njit(cache=True)(function)
+        return _compiled[function](*args)
+    return compiled
+
+
+def _frenet_bases_loop(points):
+    n = len(points) - 2
+    bases = np.empty((2, max(n, 0), 3))
+    for i in range(n):
+        t = points[i + 2] - points[i]
+        t = t / np.sqrt(np.sum(t * t))
+        da = points[i + 2] - points[i + 1]
+        v = da - np.sum(da * t) * t
+        bases[0, i] = t
+        bases[1, i] = v / np.sqrt(np.sum(v * v))
+    return bases
+
+
+def _screw_motion_loop(quaternions, translations):
+    n = len(quaternions)
+    r0 = np.zeros((n, 3))
+    axes = np.empty((n, 3))
+    phis = np.zeros(n)
+    ds = np.empty(n)
+    for i in range(n):
+        q = quaternions[i]
+        t = translations[i]
+        cosphi2 = q[0]
+        if abs(cosphi2 - 1.) < 1.e-6:
+            # No rotation, pure translation: axis parallel to the translation
+            d = np.sqrt(np.sum(t * t))
+            axes[i] = t / d
+            ds[i] = d
+            continue
+        phi = 2. * np.arccos(cosphi2)
+        sinphi2 = np.sqrt(1. - cosphi2 * cosphi2)
+        axis = q[1:] / sinphi2
+        d = np.sum(t * axis)
+        if d < 0:
+            d, axis, phi, sinphi2 = -d, -axis, -phi, -sinphi2
+        x = t - d * axis
+        cross = np.array([axis[1] * x[2] - axis[2] * x[1],
+                          axis[2] * x[0] - axis[0] * x[2],
+                          axis[0] * x[1] - axis[1] * x[0]])
+        r0[i] = 0.5 * (x - (cosphi2 / sinphi2) * cross)
+        axes[i] = axis
+        phis[i] = phi
+        ds[i] = d
+    return r0, axes, phis, ds
+
+
+def _msd_loop(r):
+    n = len(r)
+    msds = np.zeros(n)
+    for shift in range(1, n):
+        total = 0.
+        for i in range(n - shift):
+            for k in range(r.shape[1]):
+                diff = r[i + shift, k] - r[i, k]
+                total += diff * diff
+        msds[shift] = total / (n - shift)
+    return msds
+
+
+def _distance_matrix_loop(points):
+    n = len(points)
+    distances = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            total = 0.
+            for k in range(points.shape[1]):
+                diff = points[i, k] - points[j, k]
+                total += diff * diff
+            distances[i, j] = distances[j, i] = np.sqrt(total)
+    return distances
+
+
+def _rotation_matrices_loop(fbs):
+    n = fbs.shape[1] - 1
+    m = np.zeros((n, 4, 4))
+    k = np.zeros((4, 4))
+    for i in range(n):
+        for vectors in range(2):
+            s = fbs[vectors, i] + fbs[vectors, i + 1]
+            d = fbs[vectors, i] - fbs[vectors, i + 1]
+            k[0, 1], k[0, 2], k[0, 3] = d[0], d[1], d[2]
+            k[1, 0], k[1, 2], k[1, 3] = -d[0], s[2], -s[1]
+            k[2, 0], k[2, 1], k[2, 3] = -d[1], -s[2], s[0]
+            k[3, 0], k[3, 1], k[3, 2] = -d[2], s[1], -s[0]
+            # m += k.T k
+            for a in range(4):
+                for b in range(4):
+                    total = 0.
+                    for c in range(4):
+                        total += k[c, a] * k[c, b]
+                    m[i, a, b] += total
+    return m
+
+
+@register('frenet_bases', 'numba', minimum_size=MANUAL)
+def frenet_bases(points):
+    return _jit(_frenet_bases_loop)(np.ascontiguousarray(points, dtype=float))
+
+
+@register('frame_rotation_and_distance', 'numba', minimum_size=10000)
+def frame_rotation_and_distance(fbs):
+    # The eigenvectors are computed by NumPy (batched), only the matrices are built by Numba
+    fbs = np.ascontiguousarray(fbs, dtype=float)
+    if fbs.shape[1] < 2:
+        return []
+    return quaternions_and_distances(_jit(_rotation_matrices_loop)(fbs))
+
+
+@register('screw_motion', 'numba', minimum_size=MANUAL)
+def screw_motion(quaternions, translations):
+    quaternions = np.ascontiguousarray(quaternions, dtype=float).reshape(-1, 4)
+    translations = np.ascontiguousarray(translations, dtype=float).reshape(-1, 3)
+    r0, axes, phis, ds = _jit(_screw_motion_loop)(quaternions, translations)
+    return list(zip(r0, axes, phis, ds))
+
+
+@register('msd', 'numba', minimum_size=MANUAL)
+def msd(r):
+    # Exact O(n^2) algorithm: the FFT algorithm of the numpy backend is faster for large inputs
+    return _jit(_msd_loop)(np.ascontiguousarray(r, dtype=float))
+
+
+@register('distance_matrix', 'numba', minimum_size=1000)
+def distance_matrix(points):
+    return _jit(_distance_matrix_loop)(np.ascontiguousarray(points, dtype=float))
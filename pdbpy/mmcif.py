@@ -0,0 +1,562 @@
+## Reader for the mmCIF/PDBx format (https://mmcif.wwpdb.org)
+## The largest structures of the PDB are only distributed in this format.
+
+import re
+import sys
+from operator import itemgetter
+import numpy as np
+from pdbpy.download import download_pdb
+from pdbpy.profiling import instrument, open_file
+
+
+# Generic CIF tokenizer, only used when the fast path (str.split) cannot be used,
+# i.e. when a block contains quoted values with spaces or multi-line text fields
+_CIF_TOKEN = re.compile(r"""^;([^\n]*(?:\n(?!;)[^\n]*)*)\n;"""
+                        r"""|'((?:[^'\n]|'(?=\S))*)'(?=\s|$)"""
+                        r"""|"((?:[^"\n]|"(?=\S))*)"(?=\s|$)"""
+                        r"""|(\S+)""", re.MULTILINE)
+
+# A data block ends with a '#', a new loop, a new item or a new data block
+_BLOCK_END = re.compile(r'\n(?:#|_|loop_|data_)')
+
+# Beginning of a line ending the rows of a loop (see _BLOCK_END)
+_LOOP_END = ('#', '_', 'loop_', 'data_')
+
+# Columns needed to reproduce the outputs of the PDB parser
+ATOM_SITE_COLUMNS = ('group_PDB', 'label_atom_id', 'label_alt_id', 'label_comp_id',
+                     'label_asym_id', 'auth_seq_id', 'Cartn_x', 'Cartn_y', 'Cartn_z',
+                     'pdbx_PDB_model_num')
+COORDINATE_COLUMNS = ('Cartn_x', 'Cartn_y', 'Cartn_z')
+
+# Number of characters of the _atom_site loop tokenized at once
+CHUNK_SIZE = 1 << 22
+
+
+def cif_file_name(pdb_name):
+    """
+    Name of the local mmCIF file
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+    """
+    if pdb_name[-4:] == '.cif':
+        return pdb_name
+    return pdb_name + '.cif'
+
+
+def _tokenize(block):
+    """
+    Split a block of CIF data into values
+
+    The fast path splits the whole block at once. It is only valid if all the
+    quoted values are single words, which is the case for nearly all the
+    _atom_site loops (ex: "O5'"). Otherwise, the generic tokenizer is used.
+    """
+    if '\n;' not in block and not block.startswith(';'):
+        tokens = block.split()
+        if "'" not in block and '"' not in block:
+            return tokens
+        if all(token[0] not in '\'"' or (len(token) > 1 and token[-1] == token[0])
+               for token in tokens):
+            return [token[1:-1] if token[0] in '\'"' else token for token in tokens]
+    values = []
+    for match in _CIF_TOKEN.finditer(block):
+        if match.group(4) is not None:
+            values.append(match.group(4))
+        elif match.group(1) is not None:
+            values.append(match.group(1))
+        elif match.group(2) is not None:
+            values.append(match.group(2))
+        else:
+            values.append(match.group(3))
+    return values
+
+
+def _block_end(text, start):
+    """
+    Position of the end of a data block starting at start
+    """
+    match = _BLOCK_END.search(text, start)
+    if match is None:
+        return len(text)
+    return match.start()
+
+
+def read_category(text, category, columns=None):
+    """
+    Read a category of a mmCIF file, written as a loop or as key-value pairs
+
+    Parameters
+    ----------
+    text: str
+        Content of the mmCIF file
+    category: str
+        Name of the category (ex: _atom_site)
+    columns: list of str, default is None
+        Items to extract (ex: ['Cartn_x', 'Cartn_y']). If None, all the items are extracted.
+
+    Return
+    ------
+    dict
+        item name (without the category prefix): list of values (str)
+        Empty if the category is not in the file.
+    """
+    prefix = category + '.'
+    position = text.find('\n' + prefix)
+    if position == -1:
+        return {}
+    position += 1
+    # Is the category written as a loop?
+    loop_start = text.rfind('loop_', 0, position)
+    is_loop = loop_start != -1 and text[loop_start:position].split() == ['loop_']
+    if is_loop:
+        names = []
+        while text.startswith(prefix, position):
+            line_end = text.find('\n', position)
+            if line_end == -1:
+                line_end = len(text)
+            names.append(text[position + len(prefix):line_end].strip())
+            position = line_end + 1
+        end = _block_end(text, position - 1)
+        tokens = _tokenize(text[position:end])
+        n_columns = len(names)
+        if len(tokens) % n_columns != 0:
+            raise ValueError('Unable to read the {} loop: {} values for {} columns'.format(
+                category, len(tokens), n_columns))
+        if columns is None:
+            columns = names
+        table = {}
+        for name in columns:
+            if name in names:
+                table[name] = tokens[names.index(name)::n_columns]
+        return table
+    # Key-value pairs: the block ends with the first item of another category
+    end = position
+    while True:
+        end = _block_end(text, end + 1)
+        if not text.startswith('\n' + prefix, end):
+            break
+    tokens = _tokenize(text[position:end])
+    table = {}
+    for name, value in zip(tokens[0::2], tokens[1::2]):
+        name = name[len(prefix):]
+        if columns is None or name in columns:
+            table[name] = [value]
+    return table
+
+
+def _read_header(input):
+    """
+    Lines before the _atom_site category
+
+    Return
+    ------
+    header: str
+    line: str
+        1st line of the _atom_site category ('' if there is no _atom_site category)
+    """
+    header = []
+    for line in input:
+        if line.startswith('_atom_site.'):
+            return ''.join(header), line
+        header.append(line)
+    return ''.join(header), ''
+
+
+def _read_loop(input, line, names, columns, numeric):
+    """
+    Selected columns of the rows of a loop, read from input by blocks of CHUNK_SIZE
+    characters: only the values of the selected columns are kept
+    """
+    n_columns = len(names)
+    selected = [(name, names.index(name)) for name in columns if name in names]
+    table = {name: [] for name, index in selected}
+    tokens = []
+    rest = line
+    while True:
+        data = input.read(CHUNK_SIZE)
+        block = rest + data
+        rest = ''
+        if data:
+            # only complete lines, the last one is kept for the next block
+            cut = block.rfind('\n') + 1
+            block, rest = block[:cut], block[cut:]
+            # a multi-line text field (between 2 lines starting with ;) is never split
+            if ';' in block and (block.count('\n;') + block.startswith(';')) % 2:
+                rest = block + rest
+                continue
+        end = 0 if block.startswith(_LOOP_END) else _block_end(block, 0)
+        new_tokens = _tokenize(block[:end] if end < len(block) else block)
+        tokens = tokens + new_tokens if tokens else new_tokens
+        # a row can be written on several lines: the incomplete row is kept for the next block
+        complete = len(tokens) - len(tokens) % n_columns
+        for name, index in selected:
+            values = tokens[index:complete:n_columns]
+            if name in numeric:
+                table[name].append(np.array(values, dtype=float))
+            else:
+                # the same values (ex: 'ATOM', 'ALA', 'A') are stored only once
+                table[name].extend(map(sys.intern, values))
+        tokens = tokens[complete:]
+        if end < len(block) or not data:
+            break
+    if tokens:
+        raise ValueError('Unable to read the loop: {} values left for {} columns'.format(len(tokens), n_columns))
+    for name in numeric:
+        if name in table:
+            table[name] = np.concatenate(table[name]) if table[name] else np.zeros(0)
+    return table
+
+
+def read_mmcif(cif_file, columns=None, numeric=()):
+    """
+    Read a mmCIF file in a single pass: the text before the _atom_site category, and the
+    _atom_site loop, tokenized by blocks so that only the selected columns are in memory
+
+    Parameters
+    ----------
+    cif_file:
+        Path of the mmCIF file
+    columns: list of str, default is None
+        Items of _atom_site to extract (ex: ['Cartn_x', 'Cartn_y']).
+        If None, all the items are extracted.
+    numeric: list of str, default is ()
+        Items returned as numpy arrays of floats (ex: COORDINATE_COLUMNS)
+
+    Return
+    ------
+    header: str
+        Content of the file before the _atom_site category (in the files of the PDB, it
+        contains all the categories describing the entry: _struct_keywords, _entity_poly...)
+    atom_site: dict
+        item name: list of values (str), or numpy array for the numeric items.
+        Empty if the category is not in the file.
+    """
+    with open_file(cif_file, 'r') as input:
+        header, line = _read_header(input)
+        if not line:
+            return header, {}
+        item_lines = []
+        while line.startswith('_atom_site.'):
+            item_lines.append(line)
+            line = input.readline()
+        names = [item[len('_atom_site.'):].split()[0] for item in item_lines]
+        if header.rstrip().rsplit(None, 1)[-1:] == ['loop_']:
+            atom_site = _read_loop(input, line, names, names if columns is None else columns, numeric)
+            return header, atom_site
+        # Key-value pairs (a single atom): small, read with the generic reader
+        text = '\n' + ''.join(item_lines) + line + input.read()
+    atom_site = read_category(text, '_atom_site', columns)
+    for name in numeric:
+        if name in atom_site:
+            atom_site[name] = np.array(atom_site[name], dtype=float)
+    return header, atom_site
+
+
+def read_atom_site(cif_file, columns=None, numeric=()):
+    """
+    Read the _atom_site loop of a mmCIF file (see read_mmcif)
+
+    Parameters
+    ----------
+    cif_file:
+        Path of the mmCIF file
+    columns: list of str, default is None
+        Items of _atom_site to extract (ex: ['Cartn_x', 'Cartn_y']).
+        If None, all the items are extracted.
+    numeric: list of str, default is ()
+        Items returned as numpy arrays of floats
+
+    Return
+    ------
+    dict
+        item name: list of values (str) or numpy array, one value per atom
+    """
+    return read_mmcif(cif_file, columns, numeric)[1]
+
+
+def select_atoms(atom_site, all_chains=False):
+    """
+    Select the atoms read by the PDB parser: "ATOM" records of the first model,
+    first position of the alternate locations, and only the 1st chain unless
+    all_chains is True
+
+    Parameters
+    ----------
+    atom_site: dict
+        _atom_site loop, as returned by read_atom_site (ATOM_SITE_COLUMNS are required)
+        The numeric items can be numpy arrays.
+    all_chains: bool, default is False
+        If True, keep the atoms of all the chains
+
+    Return
+    ------
+    dict
+        same columns as atom_site with only the selected atoms
+    """
+    if not atom_site:
+        # no _atom_site category: no atom, as a pdb file without ATOM record
+        return {name: np.empty(0) if name in COORDINATE_COLUMNS else [] for name in ATOM_SITE_COLUMNS}
+    group = atom_site['group_PDB']
+    # label_asym_id differs between the polymer and the ligands of the same chain
+    chain = atom_site['label_asym_id']
+    model = atom_site['pdbx_PDB_model_num']
+    alt = atom_site['label_alt_id']
+    if 'ATOM' not in group:
+        return {name: _take(values, []) for name, values in atom_site.items()}
+    first = group.index('ATOM')
+    # Save only the 1st model (and the 1st chain): like a TER record, the selection
+    # ends as soon as the chain or the model changes
+    last = first
+    n_atoms = len(group)
+    if all_chains:
+        while last < n_atoms and model[last] == model[first]:
+            last += 1
+    else:
+        while last < n_atoms and chain[last] == chain[first] and model[last] == model[first]:
+            last += 1
+    # Only the first position of the alternate locations is extracted (see extract_coordinates)
+    n_selected = last - first
+    alt_selected = alt[first:last]
+    if group[first:last].count('ATOM') == n_selected and \
+            alt_selected.count('.') + alt_selected.count('?') + alt_selected.count('A') == n_selected:
+        # Usual case: nothing to remove inside the selection
+        if n_selected == n_atoms:
+            return atom_site
+        return {name: values[first:last] for name, values in atom_site.items()}
+    keep = [i for i, g, a in zip(range(first, last), group[first:last], alt_selected)
+            if g == 'ATOM' and a in ('.', '?', 'A')]
+    return {name: _take(values, keep) for name, values in atom_site.items()}
+
+
+def _take(values, keep):
+    """
+    Values at the positions keep, of a list or of a numpy array
+    """
+    if isinstance(values, np.ndarray):
+        return values[keep]
+    if len(keep) < 2:
+        return [values[i] for i in keep]
+    return list(itemgetter(*keep)(values))
+
+
+@instrument('extract', atoms=lambda entry: len(entry[1]['Cartn_x']))
+def extract_mmcif_entry(pdb_name, download_from_pdb=True, all_chains=False):
+    """
+    Extracting the atoms of the 1st chain of a mmCIF file, and the description of
+    the entry (the file is read once, see read_mmcif)
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    all_chains:
+        default is False. If True, the atoms of all the chains are extracted.
+
+    Return
+    ------
+    header: str
+        Content of the file before the _atom_site category
+    atoms: dict
+        item name of _atom_site (see ATOM_SITE_COLUMNS): list of values (str),
+        numpy array for the coordinates
+    """
+    if download_from_pdb:
+        download_pdb(pdb_name, file_format='cif')
+    header, atom_site = read_mmcif(cif_file_name(pdb_name), ATOM_SITE_COLUMNS, COORDINATE_COLUMNS)
+    return header, select_atoms(atom_site, all_chains)
+
+
+def extract_mmcif_atoms(pdb_name, download_from_pdb=True, all_chains=False):
+    """
+    Extracting the atoms of the 1st chain of a mmCIF file
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    all_chains:
+        default is False. If True, the atoms of all the chains are extracted.
+
+    Return
+    ------
+    atoms: dict
+        item name of _atom_site (see ATOM_SITE_COLUMNS): list of values (str),
+        numpy array for the coordinates
+    """
+    return extract_mmcif_entry(pdb_name, download_from_pdb, all_chains)[1]
+
+
+def mmcif_coordinates(atoms, calpha=False):
+    """
+    Coordinates of the atoms extracted with extract_mmcif_atoms
+
+    Parameters
+    ----------
+    atoms: dict
+        atoms extracted with extract_mmcif_atoms
+    calpha: bool, default is False
+        If True, only the coordinates of the carbon alpha are returned
+
+    Return
+    ------
+    coordinates: numpy array, dimension: (n, 3)
+                coordinates in nanometers
+    """
+    x, y, z = (np.asarray(atoms[name], dtype=float) for name in COORDINATE_COLUMNS)
+    if calpha:
+        keep = [i for i, name in enumerate(atoms['label_atom_id']) if name == 'CA']
+        x, y, z = x[keep], y[keep], z[keep]
+    if len(x) == 0:
+        return np.array([])
+    coordinates = np.array([x, y, z], dtype=float).T
+    # Divide by 10, so coordinates are in nanometers
+    return coordinates / 10
+
+
+def mmcif_residues(atoms):
+    """
+    Residue sequence of the atoms extracted with extract_mmcif_atoms
+    (same algorithm as extract_residues)
+    """
+    res_seq = []
+    temp = -1000
+    for residue, residue_number in zip(atoms['label_comp_id'], atoms['auth_seq_id']):
+        residue_number = int(residue_number)
+        if residue_number > temp:
+            temp = residue_number
+            res_seq.append(residue)
+    return res_seq
+
+
+def extract_mmcif_coordinates(pdb_name, download_from_pdb=True, all_chains=False):
+    """
+    Extracting the coordinates of the 1st chain of a mmCIF file
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    all_chains:
+        default is False. If True, the coordinates of all the chains are extracted.
+
+    Return
+    ------
+    coordinates: numpy array, dimension: (n, 3)
+                coordinates in nanometers
+    """
+    atoms = extract_mmcif_atoms(pdb_name, download_from_pdb, all_chains)
+    return mmcif_coordinates(atoms)
+
+
+def extract_mmcif_calpha_coordinates(pdb_name, download_from_pdb=True, all_chains=False):
+    """
+    Extracting the carbon alpha coordinates of the 1st chain of a mmCIF file
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    all_chains:
+        default is False. If True, the coordinates of all the chains are extracted.
+
+    Return
+    ------
+    coordinates: numpy array, dimension: (n, 3)
+                coordinates in nanometers
+    """
+    atoms = extract_mmcif_atoms(pdb_name, download_from_pdb, all_chains)
+    return mmcif_coordinates(atoms, calpha=True)
+
+
+def extract_mmcif_residues(pdb_name, download_from_pdb=True, all_chains=False):
+    """
+    Extracting the residue sequence of a mmCIF file
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    all_chains:
+        default is False. If True, the residues of all the chains are extracted.
+
+    Return
+    ------
+    res_seq: list
+        The sequence of residue
+    """
+    atoms = extract_mmcif_atoms(pdb_name, download_from_pdb, all_chains)
+    return mmcif_residues(atoms)
+
+
+def is_dna_or_rna_text(header):
+    """
+    Same test as is_dna_or_rna_mmcif, on the content of a mmCIF file (see read_mmcif)
+    """
+    keywords = read_category(header, '_struct_keywords', ['pdbx_keywords', 'text'])
+    for values in keywords.values():
+        for value in values:
+            if 'DNA' in value or 'RNA' in value:
+                return True
+    # Like the COMPND record, only the first molecule is tested
+    polymers = read_category(header, '_entity_poly', ['type'])
+    for value in polymers.get('type', [])[:1]:
+        if 'nucleotide' in value and 'peptide' not in value:
+            return True
+    return False
+
+
+@instrument('inspection')
+def is_dna_or_rna_mmcif(pdb_name, download_from_pdb=True):
+    """
+    Test if the the mmCIF file corresponds to a DNA or RNA structure
+    (same test as is_dna_or_rna, on the keywords and on the type of the polymers).
+    Like is_dna_or_rna, only the description of the entry is read (the categories
+    before _atom_site), not the atoms.
+
+    Parameters
+    ----------
+    pdb_name:
+        Name of the mmCIF file. (ex: 1dpx or 1dpx.cif)
+
+    download_from_pdb:
+        default is True. Use the download_pdb function (need an internet connection)
+        If False, use a local mmCIF file.
+
+    Return
+    ------
+    result: bool
+        True if the it is a DNA or a RNA molecule, False otherwise
+    """
+    if download_from_pdb:
+        download_pdb(pdb_name, file_format='cif')
+    with open_file(cif_file_name(pdb_name), 'r') as input:
+        header, line = _read_header(input)
+    return is_dna_or_rna_text(header)
@@ -1,40 +1,65 @@
 import sys
 import numpy as np
-from pdbpy.extract import extract_coordinates, extract_calpha_coordinates
+from pdbpy.export import read_first_chain, lines_to_coordinates
 from pdbpy.residues import extract_residues
 from pdbpy.data import aa_sidechain_chemical_properties as aa_hydrophobicity
 from pdbpy.msd import msd, msd_fft
-from pdbpy.download import download_pdb
 from pdbpy.inspection import is_dna_or_rna
 from pdbpy.screwframe import screwframe_rotation_centers
+from pdbpy.profiling import instrument, open_file
 
 
 class Molecule:
-    def __init__(self, pdb_name, download_from_pdb=True):
+    @instrument('Molecule', atoms=lambda molecule: len(molecule.coordinates))
+    def __init__(self, pdb_name, download_from_pdb=True, file_format='pdb'):
         """
         Parameters
         ----------
         pdb_name:
-            Name of the pdb file. (ex: 1dpx or 1dpx.pdb) 
+            Name of the pdb file. (ex: 1dpx, 1dpx.pdb or 1dpx.cif) 
 
         download_from_pdb:
             default is True. Use the download_pdb function (need an internet connection)
             If False, use a local pdb file.
+
+        file_format:
+            'pdb' (default) or 'cif' (mmCIF format).
+            If pdb_name ends with .cif, the mmCIF format is used.
         """
         self.pdb_name = pdb_name
         self.download_from_pdb = download_from_pdb
+        self.file_format = 'cif' if pdb_name[-4:] == '.cif' else file_format
+        if self.file_format == 'cif':
+            self._init_from_mmcif()
+            return
         # Verifying that it is not a RNA or DNA molecule
+        # (the file is downloaded only once, here: the next readings use the local file)
         if is_dna_or_rna(self.pdb_name, self.download_from_pdb):
             #print("{} corresponds to a DNA or RNA molecule. This code cannot analyze DNA or RNA.".format(self.pdb_name))
             sys.exit()
-        #if self.download_from_pdb:
-        #    download_pdb(self.pdb_name)
         # Extract coordinates within __init__ rather than with dedicated function for performance reasons
-        self.coordinates = extract_coordinates(self.pdb_name, download_from_pdb=self.download_from_pdb) 
+        # All atoms and C-alpha atoms are extracted from a single reading of the file
+        pdb_file = self.pdb_name if self.pdb_name[-4:] == '.pdb' else self.pdb_name + '.pdb'
+        atom_lines, calpha_index = read_first_chain(pdb_file)
+        self.coordinates = lines_to_coordinates(atom_lines)
         if len(self.coordinates) == 0:
             #print('There is probably no "ATOM" in {}'.format(self.pdb_name))
             sys.exit()
-        self.calpha_coordinates = extract_calpha_coordinates(self.pdb_name, download_from_pdb=self.download_from_pdb) 
+        self.calpha_coordinates = self.coordinates[calpha_index]
+
+    def _init_from_mmcif(self):
+        """
+        Same as __init__ for a mmCIF file. The file is downloaded and read only once:
+        the DNA/RNA test uses the description of the entry read with the atoms.
+        """
+        from pdbpy.mmcif import extract_mmcif_entry, mmcif_coordinates, is_dna_or_rna_text
+        header, self.atoms = extract_mmcif_entry(self.pdb_name, self.download_from_pdb)
+        if is_dna_or_rna_text(header):
+            sys.exit()
+        self.coordinates = mmcif_coordinates(self.atoms)
+        if len(self.coordinates) == 0:
+            sys.exit()
+        self.calpha_coordinates = mmcif_coordinates(self.atoms, calpha=True)
     
 #    def coordinates(self):
 #        """
@@ -56,6 +81,7 @@ class Molecule:
 #        calpha_coordinates = extract_calpha_coordinates(self.pdb_name, download_from_pdb=self.download_from_pdb) 
 #        return calpha_coordinates
 
+    @instrument('Molecule')
     def screw_centers(self):
         """
         Compute the coordinates of the screwframe rotation centers from the C-alpha coordinates.
@@ -68,12 +94,15 @@ class Molecule:
         self.screwframe_centers = screwframe_rotation_centers(self.calpha_coordinates)
         return self
 
+    @instrument('Molecule')
     def number_of_residues(self):
         """
         Return
         ------
         The number of residues
         """
+        if self.file_format == 'cif':
+            return len(set(self.atoms['auth_seq_id']))
         # Extracting coordinates from a pdb file - result is a file (pdb_name_coordinates.pdb)
         if self.pdb_name[-4:] == '.pdb':
             pdb_file = self.pdb_name
@@ -81,7 +110,7 @@ class Molecule:
             pdb_file = self.pdb_name + '.pdb'
  
         res_number = []
-        with open(pdb_file, 'r') as f:
+        with open_file(pdb_file, 'r') as f:
             for line in f:
                 if line[:3] == 'TER':
                     break
@@ -123,11 +152,17 @@ class Molecule:
         else:
             return self.radius_of_gyration() / len(self.coordinates)
 
+    @instrument('Molecule')
     def hydrophobicity(self):
         """
         Return the percentage of hydrophobic residue
         """
-        res_sequence = extract_residues(self.pdb_name, download_from_pdb=self.download_from_pdb)
+        if self.file_format == 'cif':
+            from pdbpy.mmcif import mmcif_residues
+            res_sequence = mmcif_residues(self.atoms)
+        else:
+            # the file has been downloaded by __init__
+            res_sequence = extract_residues(self.pdb_name, download_from_pdb=False)
         hydrophilic = 0
         hydrophobic = 0
         for res in res_sequence:
@@ -1,6 +1,9 @@
 import numpy as np
+from pdbpy.profiling import instrument
+from pdbpy import backends
 
 # MSD straightforward implementation
+@instrument('msd')
 def msd(r):
     """
     Mean square displacement
@@ -10,6 +13,11 @@ def msd(r):
     r: numpy array. dimensions: (t, 3)
        Array containing the coordinates along t
     """
+    return backends.get('msd', len(r))(r)
+
+
+@backends.register('msd', 'reference')
+def _msd_reference(r):
     shifts = np.arange(len(r))
     msds = np.zeros(shifts.size)    
     for i, shift in enumerate(shifts):
@@ -33,6 +41,7 @@ def autocorrfft(x):
     n = N*np.ones(N)-np.arange(0,N) #divide res(m) by (N-m)
     return res/n
 
+@instrument('msd')
 def msd_fft(r):
     """
     Mean square displacement (using FFT)
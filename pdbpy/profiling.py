@@ -0,0 +1,270 @@
+## Timing of the stages of pdbpy (download, extract, residues, inspection, screwframe, msd, Molecule)
+##
+## Disabled by default. To enable it:
+##     with profiling.profile() as report:
+##         m = Molecule('1dpx')
+##     print(report.summary())
+## or set the environment variable PDBPY_PROFILE: PDBPY_PROFILE=1 prints the report on stderr
+## at exit, PDBPY_PROFILE=report.json writes the report as JSON at exit.
+
+import os
+import sys
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+ENVIRONMENT_VARIABLE = 'PDBPY_PROFILE'
+
+_enabled = False
+_report = None
+_sinks = []
+_lock = threading.Lock()
+# stages running in the current thread (nested calls of the same stage are counted once)
+_active = threading.local()
+
+
+class Report:
+    """
+    Aggregated statistics of the instrumented functions
+
+    For each stage and function: number of calls, wall time (s), bytes read and atoms parsed.
+    The time and the bytes read of a stage include those of the stages it calls
+    (ex: Molecule includes extract).
+    """
+    def __init__(self):
+        # (stage, function): [calls, time, bytes_read, atoms]
+        self.functions = {}
+        # stage: [calls, time, bytes_read, atoms], without the nested calls of the same stage
+        self.stages = {}
+        # cProfile.Profile, if the report has been created with profile(cprofile=True)
+        self.profiler = None
+
+    def record(self, stage, function, elapsed, bytes_read=0, atoms=0, nested=False):
+        with _lock:
+            for stats, key in ((self.functions, (stage, function)), (self.stages, stage)):
+                if nested and stats is self.stages:
+                    continue
+                values = stats.setdefault(key, [0, 0., 0, 0])
+                values[0] += 1
+                values[1] += elapsed
+                values[2] += bytes_read
+                values[3] += atoms
+
+    def as_dict(self):
+        """
+        Return
+        ------
+        dict
+            {'stages': {stage: {'calls', 'time', 'bytes_read', 'atoms'}},
+             'functions': {'stage:function': {'calls', 'time', 'bytes_read', 'atoms'}}}
+        """
+        names = ('calls', 'time', 'bytes_read', 'atoms')
+        return {'stages': {stage: dict(zip(names, values)) for stage, values in self.stages.items()},
+                'functions': {'{}:{}'.format(*key): dict(zip(names, values))
+                              for key, values in self.functions.items()}}
+
+    def to_json(self, file_name):
+        import json
+        with open(file_name, 'w') as output:
+            json.dump(self.as_dict(), output, indent=2)
+
+    def summary(self):
+        """
+        Text table of the statistics, sorted by decreasing time
+        """
+        lines = ['{:<40s} {:>8s} {:>12s} {:>14s} {:>12s}'.format('stage / function', 'calls', 'time (s)',
+                                                                   'bytes read', 'atoms')]
+        for stage, values in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append('{:<40s} {:>8d} {:>12.6f} {:>14d} {:>12d}'.format(stage, *values))
+            functions = [(key[1], v) for key, v in self.functions.items() if key[0] == stage]
+            for function, v in sorted(functions, key=lambda item: -item[1][1]):
+                lines.append('  {:<38s} {:>8d} {:>12.6f} {:>14d} {:>12d}'.format(function, *v))
+        return '\n'.join(lines)
+
+    def print_cprofile(self, sort='cumulative', limit=30):
+        """
+        Print the statistics of cProfile (only with profile(cprofile=True))
+        """
+        if self.profiler is None:
+            print('cProfile was not enabled: use profile(cprofile=True)')
+            return
+        import pstats
+        pstats.Stats(self.profiler).sort_stats(sort).print_stats(limit)
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(report=None):
+    """
+    Start recording the stages in report (a new Report if None)
+
+    Return
+    ------
+    Report
+    """
+    global _enabled, _report
+    _report = Report() if report is None else report
+    _enabled = True
+    return _report
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def get_report():
+    """
+    Report currently (or last) recorded, None if profiling has never been enabled
+    """
+    return _report
+
+
+@contextmanager
+def profile(cprofile=False):
+    """
+    Record the stages executed within the with block
+
+    Parameters
+    ----------
+    cprofile: bool, default is False
+        If True, cProfile is also run within the with block (see Report.print_cprofile)
+
+    Return
+    ------
+    Report
+    """
+    global _enabled, _report
+    previous = _enabled, _report
+    report = enable()
+    if cprofile:
+        import cProfile
+        report.profiler = cProfile.Profile()
+        report.profiler.enable()
+    try:
+        yield report
+    finally:
+        if report.profiler is not None:
+            report.profiler.disable()
+        _enabled, _report = previous
+
+
+def add_sink(sink):
+    """
+    Add a function called after each instrumented call (only when profiling is enabled)
+
+    Parameters
+    ----------
+    sink: function(stage, function, elapsed, bytes_read, atoms)
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def add_bytes_read(n_bytes):
+    """
+    Count bytes read (or downloaded) by the instrumented function running in the current thread
+    """
+    if _enabled:
+        _active.bytes_read = getattr(_active, 'bytes_read', 0) + n_bytes
+
+
+def _position(file):
+    """
+    Number of bytes read from the file by the operating system (including the read-ahead
+    of the buffer, but not the part of the file which has not been reached)
+    """
+    raw = getattr(getattr(file, 'buffer', file), 'raw', file)
+    return raw.tell()
+
+
+@contextmanager
+def open_file(file_name, mode='r', **kwargs):
+    """
+    Same as open, for the files read by the instrumented functions: when profiling is
+    enabled, the bytes actually read from the file (the functions reading only the 1st
+    chain or the header stop before the end) are counted when it is closed
+    """
+    with open(file_name, mode, **kwargs) as file:
+        if not _enabled:
+            yield file
+            return
+        try:
+            yield file
+        finally:
+            add_bytes_read(_position(file))
+
+
+def instrument(stage, atoms=None):
+    """
+    Decorator recording the calls of a function when profiling is enabled.
+    When profiling is disabled, the only cost is the test of a global variable.
+    The bytes read are those of the files opened with open_file (and of add_bytes_read)
+    during the call, including the calls of other instrumented functions.
+
+    Parameters
+    ----------
+    stage: str
+        Name of the stage (ex: 'extract')
+    atoms: function(result), default is None
+        Return the number of atoms parsed by the function. For __init__, it is
+        called with the instance instead of the result.
+    """
+    def decorator(function):
+        name = function.__qualname__
+        constructor = function.__name__ == '__init__'
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            active = getattr(_active, 'stages', None)
+            if active is None:
+                active = _active.stages = set()
+            nested = stage in active
+            active.add(stage)
+            result = None
+            completed = False
+            bytes_before = getattr(_active, 'bytes_read', 0)
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+                completed = True
+            finally:
+                elapsed = time.perf_counter() - start
+                if not nested:
+                    active.discard(stage)
+                bytes_read = getattr(_active, 'bytes_read', 0) - bytes_before
+                n_atoms = 0
+                parsed = args[0] if constructor else result
+                if atoms is not None and completed and parsed is not None:
+                    n_atoms = atoms(parsed)
+                report = _report
+                if report is not None:
+                    report.record(stage, name, elapsed, bytes_read, n_atoms, nested)
+                for sink in _sinks:
+                    sink(stage, name, elapsed, bytes_read, n_atoms)
+            return result
+        return wrapper
+    return decorator
+
+
+def _report_at_exit(destination):
+    if _report is None:
+        return
+    if destination[-5:] == '.json':
+        _report.to_json(destination)
+    else:
+        sys.stderr.write(_report.summary() + '\n')
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    import atexit
+    enable()
+    atexit.register(_report_at_exit, os.environ[ENVIRONMENT_VARIABLE])
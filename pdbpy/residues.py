@@ -1,6 +1,8 @@
 from pdbpy.download import download_pdb
+from pdbpy.profiling import instrument, open_file
 
 
+@instrument('residues')
 def extract_residues(pdb_name, download_from_pdb=True):
     """
     Extracting the residue sequence 
@@ -29,7 +31,7 @@ def extract_residues(pdb_name, download_from_pdb=True):
     res = []
     res_number = []
 
-    with open(pdb_file, 'r') as input:
+    with open_file(pdb_file, 'r') as input:
         for line in input:
             # Save only the 1st chain
             if line[:3] == 'TER':
@@ -3,6 +3,8 @@
 
 import numpy as np
 from pdbpy.geometry import norm, normalize, screw_motion
+from pdbpy.profiling import instrument
+from pdbpy import backends
 
 
 def frenet_basis(point, before, after):
@@ -33,6 +35,7 @@ def frenet_basis(point, before, after):
     n = normal(da - np.dot(da, t)*t)
     return np.array([t, n])
 
+@instrument('screwframe')
 def frenet_bases(points):
     """
     tangent and normal vectors. Same algorithm as frenet_basis, the difference is that
@@ -59,6 +62,11 @@ def frenet_bases(points):
     because no useful Frenet bases can be defined for the
     first and last position.
     """
+    return backends.get('frenet_bases', len(points))(points)
+
+
+@backends.register('frenet_bases', 'reference')
+def _frenet_bases_reference(points):
     # tangent vectors ("point_after - point_before")
     t = normalize(points[2:] - points[:-2])
     # normal vectors 
@@ -68,6 +76,7 @@ def frenet_bases(points):
     n = normalize(np.array(n))
     return np.array([t, n])
 
+@instrument('screwframe')
 def frame_rotation_and_distance(fbs):
     """
     Computes the orientation change from one Frenet basis
@@ -87,6 +96,11 @@ def frame_rotation_and_distance(fbs):
                a frenet basis to the next
             delta: angular distance
     """
+    return backends.get('frame_rotation_and_distance', fbs.shape[1])(fbs)
+
+
+@backends.register('frame_rotation_and_distance', 'reference')
+def _frame_rotation_and_distance_reference(fbs):
     results = []   # will contain the tuples q and delta
     tangent = 0    # fbs[0] <==> tangent vectors 
     normal = 1     # fbs[1] <==> normal vectors
@@ -98,7 +112,7 @@ def frame_rotation_and_distance(fbs):
     diff_normals = fbs[normal, 0:-1] - fbs[normal, 1:]
 
     for i in range(len(sum_tangents)):
-        m = np.zeros((4, 4), np.float)
+        m = np.zeros((4, 4), float)
 
         s = sum_tangents[i]
         d = diff_tangents[i]
@@ -125,6 +139,7 @@ def frame_rotation_and_distance(fbs):
         results.append((q, delta))
     return results
 
+@instrument('screwframe')
 def screwframe_rotation_centers(calphas):
     """
     Return the successive rotation centers between 2 frenet basis
@@ -17,6 +17,7 @@ setup(name='pdbpy',
             packages=find_packages(),
             platforms='any',
             install_requires=["numpy", "urllib3"],
+            entry_points={'console_scripts': ['pdbpy = pdbpy.cli:main']},
             keywords=['PDB', 'computational biology', 'bioinformatics', 'PDB chemical / physical properties', 'structural biophysics'],
             classifiers=[
                           "Development Status :: 3 - Alpha",